@@ -37,7 +37,10 @@ async def main():
     print(f"📋 Task: {task}")
 
     # Run the team with streaming console output
-    await Console(team.run_stream(task=task))
+    try:
+        await Console(team.run_stream(task=task))
+    finally:
+        await LlmUtil.close()
 
 
 if __name__ == "__main__":
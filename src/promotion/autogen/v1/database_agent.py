@@ -13,5 +13,5 @@ database_agent = AssistantAgent(
     description="Database Agent for Snowflake databases. "
                 "Creates SQL queries, executes them using tools, and returns structured data.",
     system_message=DATABASE_AGENT_SYSTEM_MESSAGE,
-    tools=[SnowflakeUtil.execute_query],
+    tools=[SnowflakeUtil.execute_query_async, SnowflakeUtil.execute_queries_async],
 )
@@ -0,0 +1,403 @@
+"""
+Retry, backoff and adaptive concurrency control for calls to LLM endpoints.
+"""
+import asyncio
+import email.utils
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional, TypeVar
+
+import httpx
+import openai
+import requests
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504, 529}
+THROTTLE_STATUS_CODES = {429, 529}
+TRANSIENT_ERRORS = (
+    httpx.TransportError,
+    requests.ConnectionError,
+    requests.Timeout,
+    openai.APIConnectionError,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+class LlmHttpError(Exception):
+    """
+    Non-success HTTP response from an LLM endpoint.
+    """
+
+    def __init__(self, message: str, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def parse_retry_after(headers: Any) -> Optional[float]:
+    """
+    Read the server's requested delay from retry-after-ms or Retry-After, which holds either
+    seconds or an HTTP date.
+    :param headers: Response headers.
+    :return: The delay in seconds, or None if the server did not ask for one.
+    """
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed is None:
+        return None
+    return max(parsed.timestamp() - time.time(), 0.0)
+
+
+def classify_error(error: BaseException) -> tuple[bool, bool, Optional[float]]:
+    """
+    Decide whether a failed call can be retried.
+    :param error: The raised exception.
+    :return: Whether it is retryable, whether the endpoint throttled the call and the delay the endpoint asked for.
+    """
+    status_code = getattr(error, "status_code", None)
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is None:
+        response = getattr(error, "response", None)
+        retry_after = parse_retry_after(getattr(response, "headers", None))
+    if isinstance(status_code, int):
+        return status_code in RETRYABLE_STATUS_CODES, status_code in THROTTLE_STATUS_CODES, retry_after
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True, False, retry_after
+    return False, False, None
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter. A delay requested with Retry-After takes precedence.
+    """
+
+    def __init__(self, max_retries: int = 5, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def get_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Get the delay before the next attempt.
+        :param attempt: The number of the failed attempt, starting at 0.
+        :param retry_after: The delay requested by the endpoint.
+        :return:
+        """
+        if retry_after is not None:
+            # A little jitter keeps the waiting callers from returning all at once
+            return retry_after + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limit. Each success raises the limit by 1/limit, about one slot per round of
+    requests, and a throttled response halves it at most once per cooldown. Usable from threads
+    and from event loops.
+    """
+
+    def __init__(self, initial_limit: float = 8, min_limit: float = 1, max_limit: float = 64,
+                 decrease_factor: float = 0.5, decrease_cooldown: float = 1.0):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._async_waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    @property
+    def limit(self) -> int:
+        return max(int(self._limit), 1)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self):
+        """
+        Wait for a free slot.
+        """
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    async def aacquire(self):
+        """
+        Wait for a free slot without blocking the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._in_flight < self.limit:
+                    self._in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            await waiter
+
+    def release(self, throttled: bool = False, succeeded: bool = True):
+        """
+        Free a slot and adjust the limit to the outcome of the call.
+        :param throttled: The endpoint rejected the call for exceeding its quota.
+        :param succeeded: The call returned a result.
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if throttled:
+                now = time.monotonic()
+                if now - self._last_decrease >= self.decrease_cooldown:
+                    self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+                    self._last_decrease = now
+            elif succeeded:
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            self._condition.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, waiter in waiters:
+            # The waiter's loop may have been closed since, e.g. after an asyncio.run in another thread
+            if loop.is_closed():
+                continue
+            try:
+                loop.call_soon_threadsafe(AdaptiveConcurrencyLimiter._wake, waiter)
+            except RuntimeError:
+                pass
+
+    @staticmethod
+    def _wake(waiter: asyncio.Future):
+        if not waiter.done():
+            waiter.set_result(None)
+
+
+class EndpointGuard:
+    """
+    Retry policy, adaptive concurrency limit and metrics for one endpoint. Guards are shared per
+    endpoint name and configured with LLM_MAX_RETRIES, LLM_BACKOFF_BASE, LLM_BACKOFF_MAX,
+    LLM_CONCURRENCY_INITIAL, LLM_CONCURRENCY_MIN and LLM_CONCURRENCY_MAX.
+    """
+
+    _guards: dict[str, "EndpointGuard"] = {}
+    _guards_lock = threading.Lock()
+
+    def __init__(self, name: str, policy: RetryPolicy, limiter: AdaptiveConcurrencyLimiter):
+        self.name = name
+        self.policy = policy
+        self.limiter = limiter
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "attempts": 0, "retries": 0, "throttled": 0, "failures": 0,
+                       "throttle_seconds": 0.0, "backoff_seconds": 0.0}
+
+    @staticmethod
+    def for_endpoint(name: str) -> "EndpointGuard":
+        """
+        Get the shared guard for an endpoint, creating it on first use.
+        :param name: The endpoint URL or another name identifying its quota.
+        :return:
+        """
+        with EndpointGuard._guards_lock:
+            guard = EndpointGuard._guards.get(name)
+            if guard is None:
+                guard = EndpointGuard(
+                    name,
+                    RetryPolicy(
+                        max_retries=int(os.getenv("LLM_MAX_RETRIES", "5")),
+                        base_delay=float(os.getenv("LLM_BACKOFF_BASE", "0.5")),
+                        max_delay=float(os.getenv("LLM_BACKOFF_MAX", "30")),
+                    ),
+                    AdaptiveConcurrencyLimiter(
+                        initial_limit=float(os.getenv("LLM_CONCURRENCY_INITIAL", "8")),
+                        min_limit=float(os.getenv("LLM_CONCURRENCY_MIN", "1")),
+                        max_limit=float(os.getenv("LLM_CONCURRENCY_MAX", "64")),
+                    ),
+                )
+                EndpointGuard._guards[name] = guard
+            return guard
+
+    @staticmethod
+    def get_all_stats() -> dict[str, dict]:
+        """
+        Get the metrics of every guard by endpoint name.
+        :return:
+        """
+        with EndpointGuard._guards_lock:
+            guards = list(EndpointGuard._guards.values())
+        return {guard.name: guard.get_stats() for guard in guards}
+
+    def _count(self, **increments: float):
+        with self._stats_lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+
+    def _after_failure(self, error: BaseException, attempt: int) -> Optional[float]:
+        """
+        Record a failed attempt and get the delay before retrying, or None to give up.
+        """
+        retryable, throttled, retry_after = classify_error(error)
+        self.limiter.release(throttled=throttled, succeeded=False)
+        if throttled:
+            self._count(throttled=1)
+        if not retryable or attempt >= self.policy.max_retries:
+            self._count(failures=1)
+            return None
+        delay = self.policy.get_delay(attempt, retry_after)
+        self._count(retries=1, backoff_seconds=delay, **({"throttle_seconds": delay} if throttled else {}))
+        logger.warning("%s failed on attempt %d (%s), retrying in %.2fs", self.name, attempt + 1, error, delay)
+        return delay
+
+    def call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Call fn within the concurrency limit and retry transient failures.
+        :return: The result of fn.
+        """
+        self._count(calls=1)
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            self._count(attempts=1)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._after_failure(e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self.limiter.release()
+            return result
+
+    async def acall(self, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        """
+        Async variant of call.
+        :return: The result of fn.
+        """
+        self._count(calls=1)
+        attempt = 0
+        while True:
+            await self.limiter.aacquire()
+            self._count(attempts=1)
+            try:
+                result = await fn(*args, **kwargs)
+            except asyncio.CancelledError:
+                self.limiter.release(succeeded=False)
+                raise
+            except Exception as e:
+                delay = self._after_failure(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self.limiter.release()
+            return result
+
+    def stream(self, fn: Callable[..., Iterator[T]], *args: Any, **kwargs: Any) -> Iterator[T]:
+        """
+        Iterate the stream returned by fn within the concurrency limit, holding the slot until the
+        stream ends. Failures before the first item are retried like call; a stream that already
+        yielded items is not restarted, so later failures propagate.
+        :return: The items of the stream.
+        """
+        self._count(calls=1)
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            self._count(attempts=1)
+            try:
+                iterator = iter(fn(*args, **kwargs))
+                first = next(iterator)
+            except StopIteration:
+                self.limiter.release()
+                return
+            except Exception as e:
+                delay = self._after_failure(e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            break
+        succeeded = False
+        try:
+            yield first
+            yield from iterator
+            succeeded = True
+        finally:
+            self.limiter.release(succeeded=succeeded)
+
+    async def astream(self, fn: Callable[..., AsyncIterator[T]], *args: Any, **kwargs: Any) -> AsyncIterator[T]:
+        """
+        Async variant of stream.
+        :return: The items of the stream.
+        """
+        self._count(calls=1)
+        attempt = 0
+        while True:
+            await self.limiter.aacquire()
+            self._count(attempts=1)
+            try:
+                iterator = fn(*args, **kwargs).__aiter__()
+                first = await iterator.__anext__()
+            except StopAsyncIteration:
+                self.limiter.release()
+                return
+            except asyncio.CancelledError:
+                self.limiter.release(succeeded=False)
+                raise
+            except Exception as e:
+                delay = self._after_failure(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            break
+        succeeded = False
+        try:
+            yield first
+            async for item in iterator:
+                yield item
+            succeeded = True
+        finally:
+            self.limiter.release(succeeded=succeeded)
+
+    def get_stats(self) -> dict:
+        """
+        Get retry and throttling counters and the current concurrency limit.
+        :return:
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["concurrency_limit"] = self.limiter.limit
+        stats["in_flight"] = self.limiter.in_flight
+        return stats
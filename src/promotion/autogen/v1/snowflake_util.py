@@ -1,26 +1,71 @@
 """
 Utility class for connecting to Snowflake and executing queries.
 """
+import asyncio
+import atexit
+import csv
+import functools
+import io
+import json
 import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterator, Literal, Optional
 
 from dotenv import load_dotenv
 from snowflake.sqlalchemy import URL
-from sqlalchemy import create_engine, Engine, text
+from sqlalchemy import create_engine, Connection, Engine, text
+from sqlalchemy.pool import QueuePool
+
+from local_snowflake import LocalSnowflake
+from query_cache import QueryCache
 
 load_dotenv()
 
+ResultFormat = Literal["columns", "csv", "rows"]
+
 
 class SnowflakeUtil:
     """
     Utility class for connecting to Snowflake and executing queries.
     """
 
+    _engine: Optional[Engine] = None
+    _engine_lock = threading.Lock()
+    _executor: Optional[ThreadPoolExecutor] = None
+    _pending_exact: set[str] = set()
+    # Failed background exact runs by cache key, with the monotonic time of the failure
+    _exact_failures: dict[str, tuple[float, dict]] = {}
+    _stats_lock = threading.Lock()
+    _pool_stats = {
+        "checkouts": 0,
+        "checkout_time_total": 0.0,
+        "checkout_time_max": 0.0,
+    }
+
     @staticmethod
-    def get_snowflake_engine() -> Engine:
+    def is_local() -> bool:
         """
-        Get an SQL Alchemy engine connected to Snowflake.
+        Check whether SNOWFLAKE_BACKEND points at the local SQLite stand-in.
         :return:
         """
+        return os.getenv("SNOWFLAKE_BACKEND", "snowflake").lower() == "local"
+
+    @staticmethod
+    def get_snowflake_engine(**engine_kwargs) -> Engine:
+        """
+        Get an SQL Alchemy engine connected to Snowflake, or to the local stand-in
+        when SNOWFLAKE_BACKEND is "local".
+        :param engine_kwargs: Extra keyword arguments passed to create_engine.
+        :return:
+        """
+        if SnowflakeUtil.is_local():
+            return LocalSnowflake.from_env().get_engine(**engine_kwargs)
         return create_engine(
             URL(
                 account=os.getenv("SNOWFLAKE_ACCOUNT"),
@@ -30,12 +75,326 @@ class SnowflakeUtil:
                 schema=os.getenv("SNOWFLAKE_SCHEMA"),
                 warehouse=os.getenv("SNOWFLAKE_WAREHOUSE"),
                 role=os.getenv("SNOWFLAKE_ROLE"),
-            )
+            ),
+            **engine_kwargs,
         )
 
-    def execute_query(query: str):
+    @staticmethod
+    def get_engine() -> Engine:
+        """
+        Get the process-wide pooled Snowflake engine, creating it on first use.
+        The pool is configured with SNOWFLAKE_POOL_SIZE, SNOWFLAKE_POOL_MAX_OVERFLOW,
+        SNOWFLAKE_POOL_TIMEOUT and SNOWFLAKE_POOL_RECYCLE.
+        :return:
+        """
+        if SnowflakeUtil._engine is None:
+            with SnowflakeUtil._engine_lock:
+                if SnowflakeUtil._engine is None:
+                    SnowflakeUtil._engine = SnowflakeUtil.get_snowflake_engine(
+                        poolclass=QueuePool,
+                        pool_size=int(os.getenv("SNOWFLAKE_POOL_SIZE", "5")),
+                        max_overflow=int(os.getenv("SNOWFLAKE_POOL_MAX_OVERFLOW", "5")),
+                        pool_timeout=float(os.getenv("SNOWFLAKE_POOL_TIMEOUT", "30")),
+                        pool_recycle=int(os.getenv("SNOWFLAKE_POOL_RECYCLE", "3600")),
+                        pool_pre_ping=True,
+                    )
+        return SnowflakeUtil._engine
+
+    @staticmethod
+    def dispose_engine():
+        """
+        Dispose the process-wide engine and close all pooled connections.
+        A later call to get_engine() creates a fresh engine.
+        """
+        with SnowflakeUtil._engine_lock:
+            if SnowflakeUtil._engine is not None:
+                SnowflakeUtil._engine.dispose()
+                SnowflakeUtil._engine = None
+
+    @staticmethod
+    def get_executor() -> ThreadPoolExecutor:
+        """
+        Get the bounded executor that runs queries for the async tools.
+        Its size is SNOWFLAKE_MAX_CONCURRENT_QUERIES, by default the pool size,
+        so queued queries wait for a thread instead of for a pooled connection.
+        :return:
+        """
+        if SnowflakeUtil._executor is None:
+            with SnowflakeUtil._engine_lock:
+                if SnowflakeUtil._executor is None:
+                    max_workers = int(os.getenv("SNOWFLAKE_MAX_CONCURRENT_QUERIES",
+                                                os.getenv("SNOWFLAKE_POOL_SIZE", "5")))
+                    SnowflakeUtil._executor = ThreadPoolExecutor(
+                        max_workers=max_workers, thread_name_prefix="snowflake-query")
+        return SnowflakeUtil._executor
+
+    @staticmethod
+    def shutdown():
+        """
+        Stop the query executor and dispose the process-wide engine.
+        """
+        with SnowflakeUtil._engine_lock:
+            executor, SnowflakeUtil._executor = SnowflakeUtil._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        SnowflakeUtil.dispose_engine()
+
+    @staticmethod
+    @contextmanager
+    def connect() -> Iterator[Connection]:
+        """
+        Check out a connection from the pooled engine and record the checkout latency.
+        :return:
+        """
+        start = time.perf_counter()
+        with SnowflakeUtil.get_engine().connect() as connection:
+            elapsed = time.perf_counter() - start
+            with SnowflakeUtil._stats_lock:
+                stats = SnowflakeUtil._pool_stats
+                stats["checkouts"] += 1
+                stats["checkout_time_total"] += elapsed
+                stats["checkout_time_max"] = max(stats["checkout_time_max"], elapsed)
+            yield connection
+
+    @staticmethod
+    def get_pool_stats() -> dict:
+        """
+        Get the connection pool checkout counters.
+        :return: Number of checkouts, total/average/max checkout latency in seconds
+                 and the current pool status.
+        """
+        with SnowflakeUtil._stats_lock:
+            stats = dict(SnowflakeUtil._pool_stats)
+        checkouts = stats["checkouts"]
+        stats["checkout_time_avg"] = stats["checkout_time_total"] / checkouts if checkouts else 0.0
+        engine = SnowflakeUtil._engine
+        stats["pool_status"] = engine.pool.status() if engine is not None else "not created"
+        return stats
+
+    @staticmethod
+    def type_name(value) -> str:
+        """
+        Get the short type name used in compact results for a fetched value.
+        :param value: A value as returned by the Snowflake driver.
+        :return:
+        """
+        if isinstance(value, bool):
+            return "bool"
+        if isinstance(value, int):
+            return "int"
+        if isinstance(value, (Decimal, float)):
+            return "number"
+        if isinstance(value, datetime):
+            return "timestamp"
+        if isinstance(value, date):
+            return "date"
+        return "string"
+
+    @staticmethod
+    def normalize_value(value):
+        """
+        Convert a fetched value into a compact JSON-friendly value.
+        Decimals become int or float, dates and timestamps ISO strings and binary values hex strings.
+        :param value: A value as returned by the Snowflake driver.
+        :return:
+        """
+        if isinstance(value, Decimal):
+            return int(value) if value == value.to_integral_value() else float(value)
+        if isinstance(value, float):
+            return int(value) if value.is_integer() else round(value, 6)
+        if hasattr(value, "isoformat"):
+            return value.isoformat()
+        if isinstance(value, (bytes, bytearray)):
+            return value.hex()
+        return value
+
+    @staticmethod
+    def fetch_rows(result, max_rows: int, max_bytes: int, fetch_size: int) -> dict:
+        """
+        Stream rows from a query result in batches until the row or byte cap is reached.
+        :param result: SQL Alchemy result opened with stream_results.
+        :param max_rows: Maximum number of rows to keep.
+        :param max_bytes: Maximum approximate size of the kept rows in bytes.
+        :param fetch_size: Number of rows fetched per batch.
+        :return: Column names and types, the kept rows as normalized tuples, row count,
+                 total row count and truncation marker. A column's type comes from its first
+                 non-null value, except that int widens to number when a later value is fractional.
+        """
+        columns = list(result.keys())
+        types = [None] * len(columns)
+        rows = []
+        size = 0
+        truncated = False
+        for partition in result.partitions(fetch_size):
+            for row in partition:
+                for i, value in enumerate(row):
+                    if value is not None and types[i] in (None, "int"):
+                        # An int column widens to number once a later value has a fraction
+                        types[i] = SnowflakeUtil.type_name(value) if types[i] is None else (
+                            "number" if SnowflakeUtil.type_name(value) == "number" else "int")
+                normalized = tuple(SnowflakeUtil.normalize_value(value) for value in row)
+                row_size = len(json.dumps(normalized, default=str))
+                if len(rows) >= max_rows or size + row_size > max_bytes:
+                    truncated = True
+                    break
+                rows.append(normalized)
+                size += row_size
+            if truncated:
+                break
+
+        # Snowflake reports the full result size on the cursor, so the remaining
+        # rows do not have to be fetched to know how many there are.
+        total_rows = result.rowcount if result.rowcount is not None and result.rowcount >= 0 else None
+        if not truncated:
+            total_rows = len(rows)
+        result.close()
+
+        return {
+            "columns": columns,
+            "types": [t or "null" for t in types],
+            "rows": rows,
+            "row_count": len(rows),
+            "total_rows": total_rows,
+            "truncated": truncated,
+        }
+
+    @staticmethod
+    def format_result(fetched: dict, result_format: ResultFormat) -> dict:
+        """
+        Encode fetched rows for the LLM.
+        "columns" lists the column names and types once, followed by one value array per column.
+        "csv" returns a CSV block whose header holds name:type pairs.
+        "rows" returns one dictionary per row.
+        :param fetched: The output of fetch_rows.
+        :param result_format: One of "columns", "csv" or "rows".
+        :return:
+        """
+        output = {key: value for key, value in fetched.items() if key not in ("columns", "types", "rows")}
+        columns, types, rows = fetched["columns"], fetched["types"], fetched["rows"]
+        output["format"] = result_format
+        if result_format == "rows":
+            output["data"] = [dict(zip(columns, row)) for row in rows]
+        elif result_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator="\n")
+            writer.writerow([f"{column}:{column_type}" for column, column_type in zip(columns, types)])
+            writer.writerows(rows)
+            output["data"] = buffer.getvalue()
+        elif result_format == "columns":
+            output["columns"] = columns
+            output["types"] = types
+            output["data"] = [[row[i] for row in rows] for i in range(len(columns))]
+        else:
+            raise ValueError(f"Unsupported result format: {result_format}")
+        return output
+
+    @staticmethod
+    def estimate_scan(connection: Connection, query: str) -> dict:
+        """
+        Estimate how much data a query scans with EXPLAIN USING JSON, without running it.
+        :param connection: An open Snowflake connection.
+        :param query: The SELECT query to estimate.
+        :return: Assigned and total partitions and the bytes to be scanned.
+        """
+        plan = connection.execute(text(f"EXPLAIN USING JSON {query}")).scalar()
+        stats = json.loads(plan).get("GlobalStats", {})
+        return {
+            "partitions_assigned": stats.get("partitionsAssigned", 0),
+            "partitions_total": stats.get("partitionsTotal", 0),
+            "bytes_assigned": stats.get("bytesAssigned", 0),
+        }
+
+    @staticmethod
+    def check_scan_budget(estimate: dict) -> Optional[str]:
+        """
+        Compare a scan estimate with the SNOWFLAKE_MAX_SCAN_BYTES and SNOWFLAKE_MAX_SCAN_PARTITIONS
+        budgets. A budget of 0 is unlimited.
+        :param estimate: The output of estimate_scan.
+        :return: A description of the exceeded budget, or None if the query is within budget.
+        """
+        max_bytes = int(os.getenv("SNOWFLAKE_MAX_SCAN_BYTES", str(10 * 1024 ** 3)))
+        max_partitions = int(os.getenv("SNOWFLAKE_MAX_SCAN_PARTITIONS", "0"))
+        if max_bytes and estimate["bytes_assigned"] > max_bytes:
+            return (f"the query would scan {estimate['bytes_assigned'] / 1024 ** 3:.1f} GB, "
+                    f"over the budget of {max_bytes / 1024 ** 3:.1f} GB")
+        if max_partitions and estimate["partitions_assigned"] > max_partitions:
+            return (f"the query would scan {estimate['partitions_assigned']} of "
+                    f"{estimate['partitions_total']} partitions, over the budget of {max_partitions}")
+        return None
+
+    @staticmethod
+    def _scale_aggregates(query: str, factor: float) -> str:
+        """
+        Scale COUNT and SUM aggregates by a factor so that results over a sample estimate the full table.
+        Window functions are left unchanged.
+        :param query: The SQL query.
+        :param factor: The scale factor, 100 / sample percent.
+        :return:
+        """
+        output = []
+        position = 0
+        for match in re.finditer(r"(?<![\w.])(COUNT|SUM)\s*\(", query, flags=re.IGNORECASE):
+            if match.start() < position:
+                continue
+            depth = 0
+            end = match.end() - 1
+            while end < len(query):
+                depth += {"(": 1, ")": -1}.get(query[end], 0)
+                if depth == 0:
+                    break
+                end += 1
+            if depth != 0 or re.match(r"\s*OVER\b", query[end + 1:], flags=re.IGNORECASE):
+                continue
+            aggregate = query[match.start():end + 1]
+            digits = "" if match.group(1).upper() == "COUNT" else ", 2"
+            output.append(query[position:match.start()])
+            output.append(f"ROUND({aggregate} * {factor:g}{digits})")
+            position = end + 1
+        output.append(query[position:])
+        return "".join(output)
+
+    @staticmethod
+    def to_sampled_query(query: str, percent: float) -> str:
+        """
+        Rewrite a query to read a block sample of the large tables listed in SNOWFLAKE_SAMPLE_TABLES.
+        COUNT and SUM are scaled up to estimate the full table and MEDIAN becomes APPROX_PERCENTILE.
+        Distinct values, MIN and MAX cannot be estimated from a sample, so such queries are not sampled.
+        :param query: The SQL query.
+        :param percent: The sample size in percent.
+        :return: The rewritten query, or the original query if it reads none of the sampled tables
+                 or cannot be estimated from a sample.
+        """
+        if re.search(r"\bDISTINCT\b|(?<![\w.])(?:MIN|MAX)\s*\(", query, flags=re.IGNORECASE):
+            return query
+        tables = "|".join(re.escape(table.strip()) for table in
+                          os.getenv("SNOWFLAKE_SAMPLE_TABLES", "QUOTE_CED").split(",") if table.strip())
+        keywords = ("WHERE|JOIN|INNER|LEFT|RIGHT|FULL|CROSS|NATURAL|ON|USING|GROUP|ORDER|LIMIT|HAVING|"
+                    "QUALIFY|UNION|EXCEPT|INTERSECT|MINUS|SAMPLE|TABLESAMPLE")
+        pattern = (rf'(\b(?:FROM|JOIN)\s+(?:"?\w+"?\.){{0,2}}"?(?:{tables})\b"?)'
+                   rf'(\s+(?:AS\s+)?(?!(?:{keywords})\b)[A-Za-z_]\w*)?(?!\s+(?:SAMPLE|TABLESAMPLE)\b)')
+        sampled, count = re.subn(pattern, lambda m: f"{m.group(1)}{m.group(2) or ''} SAMPLE SYSTEM ({percent:g})",
+                                 query, flags=re.IGNORECASE)
+        if count == 0:
+            return query
+        sampled = re.sub(r"\bMEDIAN\s*\(([^()]*)\)", r"APPROX_PERCENTILE(\1, 0.5)", sampled, flags=re.IGNORECASE)
+        return SnowflakeUtil._scale_aggregates(sampled, 100 / percent)
+
+    def execute_query(query: str, use_cache: bool = True, result_format: Optional[ResultFormat] = None,
+                      approximate: bool = False):
         """
         Execute a SQL query against Snowflake and return the results.
+        Rows are streamed and capped by SNOWFLAKE_MAX_ROWS and SNOWFLAKE_MAX_BYTES;
+        a capped result has "truncated" set and "total_rows" holds the full row count.
+        Successful results are served from the shared QueryCache unless use_cache is False.
+        Before a query runs, its scan is estimated with EXPLAIN; a query over the scan budget is
+        not executed and returns error_type "too_expensive" with the estimate.
+        :param query: The SELECT query to execute.
+        :param use_cache: Set to False to bypass the result cache and always query Snowflake.
+        :param result_format: "columns" (column names once plus one array per column), "csv" or "rows"
+                              (one object per row). Defaults to SNOWFLAKE_RESULT_FORMAT or "columns".
+        :param approximate: Set to True for a quick estimate from a SNOWFLAKE_SAMPLE_PERCENT sample of
+                            QUOTE_CED, flagged "approximate". The exact query then runs in the background
+                            and a later call with approximate=False is answered from the cache.
         :return:
         """
 
@@ -48,25 +407,191 @@ class SnowflakeUtil:
         if not query.strip().upper().startswith("SELECT"):
             return resultValue
 
-        engine = SnowflakeUtil.get_snowflake_engine()
+        result_format = result_format or os.getenv("SNOWFLAKE_RESULT_FORMAT", "columns")
+        cache_key = QueryCache.make_key(query)
+        # An exact result that is already cached beats an estimate; the stand-in cannot sample
+        if approximate and not SnowflakeUtil.is_local() and not (
+                QueryCache.is_enabled() and QueryCache.shared().contains(cache_key)):
+            percent = float(os.getenv("SNOWFLAKE_SAMPLE_PERCENT", "10"))
+            sampled_query = SnowflakeUtil.to_sampled_query(query, percent)
+            if sampled_query != query:
+                resultValue = SnowflakeUtil.execute_query(sampled_query, use_cache, result_format)
+                if resultValue["success"]:
+                    resultValue["approximate"] = True
+                    resultValue["sample_percent"] = percent
+                    resultValue["approximation"] = (
+                        f"Estimated from a {percent:g}% block sample of the large tables: counts and sums are "
+                        f"scaled to the full table.")
+                    failure = SnowflakeUtil._exact_failure(cache_key)
+                    if failure is not None:
+                        resultValue["exact_pending"] = False
+                        resultValue["exact_error"] = failure["error"]
+                    else:
+                        resultValue["exact_pending"] = SnowflakeUtil._run_exact_in_background(query, cache_key)
+                return resultValue
+
+        # A failed background run is reported once instead of repeating a query that already failed
+        failure = SnowflakeUtil._exact_failure(cache_key, pop=True)
+        if failure is not None:
+            resultValue.update(failure)
+            resultValue["error"] = f"The exact query failed in the background: {failure['error']}"
+            return resultValue
+
         try:
-            with engine.connect() as connection:
-                result = connection.execute(text(query))
-                data = result.fetchall()
-                resultValue["success"] = True
-                resultValue["error"] = ""
-                resultValue["data"] = [dict(row._mapping) for row in data]
+            fetched = QueryCache.shared().get(cache_key) if use_cache and QueryCache.is_enabled() else None
+            if fetched is not None:
+                resultValue["cached"] = True
+            else:
+                with SnowflakeUtil.connect() as connection:
+                    preflight = os.getenv("SNOWFLAKE_SCAN_PREFLIGHT", "true").lower() in ("1", "true", "yes")
+                    if preflight and not SnowflakeUtil.is_local():
+                        estimate = SnowflakeUtil.estimate_scan(connection, query)
+                        over_budget = SnowflakeUtil.check_scan_budget(estimate)
+                        if over_budget:
+                            resultValue["error"] = (
+                                f"Query not executed: {over_budget}. Add a QUOTE_DATE range or other "
+                                f"selective filter, or aggregate further, and try again.")
+                            resultValue["error_type"] = "too_expensive"
+                            resultValue["estimate"] = estimate
+                            return resultValue
+                    result = connection.execution_options(stream_results=True).execute(text(query))
+                    fetched = SnowflakeUtil.fetch_rows(
+                        result,
+                        max_rows=int(os.getenv("SNOWFLAKE_MAX_ROWS", "1000")),
+                        max_bytes=int(os.getenv("SNOWFLAKE_MAX_BYTES", "1000000")),
+                        fetch_size=int(os.getenv("SNOWFLAKE_FETCH_SIZE", "500")),
+                    )
+                # A bypassed lookup still refreshes the cache with the fresh result
+                if QueryCache.is_enabled():
+                    QueryCache.shared().put(cache_key, fetched, len(json.dumps(fetched["rows"], default=str)))
+            resultValue.update(SnowflakeUtil.format_result(fetched, result_format))
+            resultValue["success"] = True
+            resultValue["error"] = ""
         except Exception as e:
             resultValue["error"] = str(e)
-        finally:
-            engine.dispose()
 
         return resultValue
 
+    @staticmethod
+    def _exact_failure(cache_key: str, pop: bool = False) -> Optional[dict]:
+        """
+        Get the failure of the last background exact run of a query. Failures expire with the
+        QUERY_CACHE_TTL of the results they stand in for.
+        :param cache_key: The cache key of the exact query.
+        :param pop: Set to True to remove the failure once it is reported.
+        :return: The error details, or None if the query has no recent failure.
+        """
+        now = time.monotonic()
+        with SnowflakeUtil._stats_lock:
+            entry = SnowflakeUtil._exact_failures.get(cache_key)
+            if entry is None:
+                return None
+            expired = now - entry[0] > QueryCache.shared().ttl_seconds
+            if pop or expired:
+                del SnowflakeUtil._exact_failures[cache_key]
+            return None if expired else entry[1]
+
+    @staticmethod
+    def _run_exact_in_background(query: str, cache_key: str) -> bool:
+        """
+        Run the exact query on the query executor so that its result lands in the cache.
+        A failure is recorded and reported by the next call for the query; at most
+        QUERY_CACHE_MAX_ENTRIES failures are kept, the oldest are dropped first.
+        :param query: The exact SQL query.
+        :param cache_key: The cache key of the exact query.
+        :return: True if the exact result will be available from the cache.
+        """
+        if not QueryCache.is_enabled():
+            return False
+        with SnowflakeUtil._stats_lock:
+            if cache_key in SnowflakeUtil._pending_exact:
+                return True
+            SnowflakeUtil._pending_exact.add(cache_key)
+            # A new run supersedes the outcome of the previous one
+            SnowflakeUtil._exact_failures.pop(cache_key, None)
+
+        def run():
+            failure = None
+            try:
+                result = SnowflakeUtil.execute_query(query, use_cache=False)
+                if not result["success"]:
+                    failure = {key: result[key] for key in ("error", "error_type", "estimate") if key in result}
+            except Exception as e:
+                failure = {"error": str(e)}
+            finally:
+                with SnowflakeUtil._stats_lock:
+                    SnowflakeUtil._pending_exact.discard(cache_key)
+                    failures = SnowflakeUtil._exact_failures
+                    failures.pop(cache_key, None)
+                    if failure is not None:
+                        failures[cache_key] = (time.monotonic(), failure)
+                        while len(failures) > QueryCache.shared().max_entries:
+                            del failures[next(iter(failures))]
+
+        SnowflakeUtil.get_executor().submit(run)
+        return True
+
+    @staticmethod
+    async def execute_query_async(query: str, use_cache: bool = True,
+                                  result_format: Optional[ResultFormat] = None, approximate: bool = False):
+        """
+        Execute a SQL query against Snowflake without blocking the event loop.
+        The query runs on the bounded query executor; see execute_query for the result format.
+        :param query: The SELECT query to execute.
+        :param use_cache: Set to False to bypass the result cache and always query Snowflake.
+        :param result_format: "columns" (column names once plus one array per column), "csv" or "rows"
+                              (one object per row). Defaults to SNOWFLAKE_RESULT_FORMAT or "columns".
+        :param approximate: Set to True for a quick estimate from a sample of QUOTE_CED while the exact
+                            query runs in the background; a later call with approximate=False gets the exact result.
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            SnowflakeUtil.get_executor(),
+            functools.partial(SnowflakeUtil.execute_query, query, use_cache, result_format, approximate),
+        )
+
+    @staticmethod
+    async def execute_queries_async(queries: list[str], use_cache: bool = True,
+                                    result_format: Optional[ResultFormat] = None, approximate: bool = False):
+        """
+        Execute several independent SQL queries against Snowflake concurrently.
+        Use this instead of several execute_query calls when the queries do not depend on each other.
+        At most SNOWFLAKE_MAX_CONCURRENT_QUERIES queries of one call run at the same time.
+        :param queries: The SELECT queries to execute.
+        :param use_cache: Set to False to bypass the result cache and always query Snowflake.
+        :param result_format: Result format of every query, see execute_query.
+        :param approximate: Estimate every query from a sample, see execute_query.
+        :return: Per-query results, in the order of the queries, with their timings.
+        """
+        semaphore = asyncio.Semaphore(int(os.getenv("SNOWFLAKE_MAX_CONCURRENT_QUERIES",
+                                                    os.getenv("SNOWFLAKE_POOL_SIZE", "5"))))
+
+        async def run(query: str) -> dict:
+            async with semaphore:
+                start = time.perf_counter()
+                result = await SnowflakeUtil.execute_query_async(query, use_cache, result_format, approximate)
+                return dict(result, query=query, elapsed_ms=round((time.perf_counter() - start) * 1000, 1))
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(run(query) for query in queries))
+        return {
+            "success": all(result["success"] for result in results),
+            "results": results,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+
+
+atexit.register(SnowflakeUtil.shutdown)
+
 
 def main():
     result = SnowflakeUtil.execute_query("SELECT GETDATE()")
     print(result)
+    result = asyncio.run(SnowflakeUtil.execute_query_async("SELECT GETDATE()", use_cache=False))
+    print(result)
+    print(SnowflakeUtil.get_pool_stats())
+    print(QueryCache.shared().get_stats())
 
 
 if __name__ == "__main__":
@@ -2,37 +2,61 @@
 Promotion Analysis System
 """
 import asyncio
-import os
+from typing import Optional
 
 from autogen_agentchat.conditions import MaxMessageTermination, TextMentionTermination
 from autogen_agentchat.teams import SelectorGroupChat
 from autogen_agentchat.ui import Console
 
-from database_agent import database_agent
+from database_agent import create_database_agent
 from llm_util import LlmUtil
-from planning_agent import planning_agent
+from model_tiers import ModelTiers
+from planning_agent import CachedPlanningAgent, create_planning_agent
 from prompt import SELECTOR_GROUP_CHAT_PROMPT
-from sql_judge_agent import sql_judge_agent
-from writer_agent import writer_agent
+from selector_context import SelectorContext
+from speaker_selector import SpeakerSelector
+from sql_judge_agent import StaticSqlJudge, create_sql_judge_agent
+from writer_agent import create_writer_agent
 
 class Analyzer:
 
     """
     Analyzer class to process and analyze promotion data.
     """
-    def __init__(self):
+    def __init__(self, tier: Optional[str] = None):
+        """
+        :param tier: The model tier of the agents, by default MODEL_TIER.
+        """
         # Setup termination conditions
         text_mention_termination = TextMentionTermination("TERMINATE")
         max_messages_termination = MaxMessageTermination(max_messages=12)
         termination = max_messages_termination | text_mention_termination
 
+        # The fixed workflow order is followed without a model call; only ambiguous turns use the selector prompt
+        self.speaker_selector = SpeakerSelector()
+        # The selector prompt sees a bounded history with tool results summarized
+        self.selector_context = SelectorContext() if SelectorContext.is_enabled() else None
+
+        # Each agent gets the model of its role in the tier
+        self.tier = ModelTiers.get_tier(tier)
+        self.models = ModelTiers.get_models(self.tier)
+        self.planning_agent = create_planning_agent(self.models["planning"])
+        self.sql_judge_agent = create_sql_judge_agent(self.models["sql_judge"])
+
         # Create the team
         self.team = SelectorGroupChat(
-            [planning_agent, database_agent, sql_judge_agent, writer_agent],
-            model_client=LlmUtil.get_llm(os.environ.get("AZURE_OPENAI_API_MODEL_GPT_4_1")),
+            [
+                self.planning_agent,
+                create_database_agent(self.models["database"]),
+                self.sql_judge_agent,
+                create_writer_agent(self.models["writer"]),
+            ],
+            model_client=LlmUtil.get_llm(self.models["selector"].model, self.models["selector"].deployment),
             termination_condition=termination,
             selector_prompt=SELECTOR_GROUP_CHAT_PROMPT,
             allow_repeated_speaker=True,
+            selector_func=self.speaker_selector if SpeakerSelector.is_enabled() else None,
+            model_context=self.selector_context,
         )
 
     async def run(self, task: str):
@@ -56,12 +80,22 @@ async def main():
     # Example task for console testing
     task = input("Enter your question about promotions: ")
 
-    if task.strip():
-        print(f"📋 Processing: {task}")
-        # Run the team with streaming console output
-        await Console(await analyzer.run(task))
-    else:
-        print("No question provided. Exiting.")
+    try:
+        if task.strip():
+            print(f"📋 Processing: {task}")
+            # Run the team with streaming console output
+            await Console(await analyzer.run(task))
+            print(f"📊 Speaker selection: {analyzer.speaker_selector.get_stats()}")
+            if analyzer.selector_context is not None:
+                print(f"📊 Selector context: {analyzer.selector_context.get_stats()}")
+            if isinstance(analyzer.planning_agent, CachedPlanningAgent):
+                print(f"📊 Plan cache: {analyzer.planning_agent.get_stats()}")
+            if isinstance(analyzer.sql_judge_agent, StaticSqlJudge):
+                print(f"📊 SQL judge: {analyzer.sql_judge_agent.get_stats()}")
+        else:
+            print("No question provided. Exiting.")
+    finally:
+        await LlmUtil.close()
 
 
 if __name__ == "__main__":
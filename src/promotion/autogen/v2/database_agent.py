@@ -1,19 +1,29 @@
 """
 Database Agent for Snowflake databases.
 """
-import os
+from typing import Optional
 
 from autogen_agentchat.agents import AssistantAgent
 
 from llm_util import LlmUtil
+from model_tiers import ModelDeployment, ModelTiers
 from prompt import DATABASE_AGENT_SYSTEM_MESSAGE
 from snowflake_util import SnowflakeUtil
 
-database_agent = AssistantAgent(
-    name="DatabaseAgent",
-    model_client=LlmUtil.get_llm(os.environ.get("AZURE_OPENAI_API_MODEL_GPT_4_1")),
-    description="Database Agent for Snowflake databases. "
-                "Creates SQL queries, executes them using tools, and returns structured data.",
-    system_message=DATABASE_AGENT_SYSTEM_MESSAGE,
-    tools=[SnowflakeUtil.execute_query],
-)
\ No newline at end of file
+
+def create_database_agent(model: Optional[ModelDeployment] = None) -> AssistantAgent:
+    """
+    Create the Database Agent.
+    :param model: The model and deployment, by default those of the database role in the configured tier.
+    :return:
+    """
+    model = model or ModelTiers.get_model("database")
+    return AssistantAgent(
+        name="DatabaseAgent",
+        model_client=LlmUtil.get_llm(model.model, model.deployment),
+        description="Database Agent for Snowflake databases. "
+                    "Creates SQL queries, executes them using tools, and returns structured data.",
+        system_message=DATABASE_AGENT_SYSTEM_MESSAGE,
+        tools=[SnowflakeUtil.execute_query_async, SnowflakeUtil.execute_queries_async],
+    )
+
@@ -3,44 +3,205 @@ Utility for managing Azure OpenAI credentials and client.
 """
 import asyncio
 import os
+import threading
+from typing import Any, AsyncGenerator, Optional, Union
 
-from autogen_core.models import UserMessage
+import httpx
+from autogen_core.models import CreateResult, RequestUsage, UserMessage
 from autogen_ext.auth.azure import AzureTokenProvider
 from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
 from azure.identity import DefaultAzureCredential
 from dotenv import load_dotenv
 
+from resilience import EndpointGuard
+
 load_dotenv()
 
 
+class ResilientAzureOpenAIChatCompletionClient(AzureOpenAIChatCompletionClient):
+    """
+    Azure OpenAI client whose calls, streamed or not, are retried with backoff and limited by the
+    adaptive concurrency limit of its deployment. The OpenAI client's own retries are disabled.
+    """
+
+    def __init__(self, **kwargs: Any):
+        kwargs.setdefault("max_retries", 0)
+        super().__init__(**kwargs)
+        self._guard = EndpointGuard.for_endpoint(f"{kwargs.get('azure_endpoint')}/{kwargs.get('azure_deployment')}")
+
+    async def create(self, *args: Any, **kwargs: Any) -> CreateResult:
+        return await self._guard.acall(super().create, *args, **kwargs)
+
+    async def create_stream(self, *args: Any, **kwargs: Any) -> AsyncGenerator[Union[str, CreateResult], None]:
+        # Failures before the first chunk are retried; the slot is held until the stream ends
+        async for chunk in self._guard.astream(super().create_stream, *args, **kwargs):
+            yield chunk
+
+
+class LoopBoundTransport(httpx.AsyncBaseTransport):
+    """
+    HTTP transport with one connection pool per event loop. httpx connections belong to the loop
+    that opened them, so a client shared across asyncio.run calls must not reuse them in the next
+    loop. The pool of a loop is closed by the loop's async generator shutdown, which asyncio.run
+    performs before closing the loop.
+    """
+
+    def __init__(self, **transport_kwargs: Any):
+        self._transport_kwargs = transport_kwargs
+        self._transports: dict[asyncio.AbstractEventLoop, tuple[httpx.AsyncHTTPTransport, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _transport(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            # Loops closed without shutting down their async generators leave their entry behind
+            for stale in [other for other in self._transports if other.is_closed()]:
+                del self._transports[stale]
+            state = self._transports.get(loop)
+            if state is None:
+                transport = httpx.AsyncHTTPTransport(**self._transport_kwargs)
+                closer = self._close_on_shutdown(loop, transport)
+                state = (transport, closer)
+                self._transports[loop] = state
+                # Starting the generator registers it with the loop, so shutdown_asyncgens finalizes it
+                asyncio.ensure_future(closer.__anext__())
+        return state[0]
+
+    async def _close_on_shutdown(self, loop: asyncio.AbstractEventLoop, transport: httpx.AsyncHTTPTransport):
+        try:
+            yield
+        finally:
+            with self._lock:
+                if self._transports.get(loop, (None,))[0] is transport:
+                    del self._transports[loop]
+            await transport.aclose()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport().handle_async_request(request)
+
+    async def aclose(self):
+        """
+        Close the connection pool of the running loop; the pools of other loops close with their loop.
+        """
+        with self._lock:
+            state = self._transports.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state[0].aclose()
+
+
 class LlmUtil:
     """
     Utility class for managing Azure OpenAI credentials and client.
+    Clients are shared per model and deployment, and all of them use one credential,
+    one token cache and one HTTP client, which keeps a connection pool per event loop.
     """
 
+    _clients: dict[tuple, AzureOpenAIChatCompletionClient] = {}
+    _credential: Optional[DefaultAzureCredential] = None
+    _token_provider: Optional[AzureTokenProvider] = None
+    _http_client: Optional[httpx.AsyncClient] = None
+    _lock = threading.Lock()
+
     @staticmethod
     def get_azure_credential() -> AzureTokenProvider:
         """
-        Get Azure credential using DefaultAzureCredential and create a token provider.
+        Get the shared token provider backed by a single DefaultAzureCredential.
+        The AAD token is fetched once and refreshed by the provider when it expires.
         :return:
         """
-        return AzureTokenProvider(
-            DefaultAzureCredential(),
-            "https://cognitiveservices.azure.com/.default",
+        with LlmUtil._lock:
+            if LlmUtil._token_provider is None:
+                LlmUtil._credential = DefaultAzureCredential()
+                LlmUtil._token_provider = AzureTokenProvider(
+                    LlmUtil._credential,
+                    "https://cognitiveservices.azure.com/.default",
+                )
+            return LlmUtil._token_provider
+
+    @staticmethod
+    def get_http_client() -> httpx.AsyncClient:
+        """
+        Get the keep-alive HTTP client shared by all model clients.
+        The pool of each event loop is sized with LLM_HTTP_MAX_CONNECTIONS and LLM_HTTP_MAX_KEEPALIVE.
+        :return:
+        """
+        with LlmUtil._lock:
+            if LlmUtil._http_client is None or LlmUtil._http_client.is_closed:
+                LlmUtil._http_client = httpx.AsyncClient(
+                    transport=LoopBoundTransport(limits=httpx.Limits(
+                        max_connections=int(os.environ.get("LLM_HTTP_MAX_CONNECTIONS", "20")),
+                        max_keepalive_connections=int(os.environ.get("LLM_HTTP_MAX_KEEPALIVE", "10")),
+                    )),
+                    timeout=httpx.Timeout(float(os.environ.get("LLM_HTTP_TIMEOUT", "120")), connect=10.0),
+                )
+            return LlmUtil._http_client
+
+    @staticmethod
+    def get_llm(model: str, deployment: Optional[str] = None) -> AzureOpenAIChatCompletionClient:
+        """
+        Get the shared Azure OpenAI Chat Completion client for a model, creating it on first use.
+        :param model: The model name.
+        :param deployment: The Azure deployment, by default AZURE_OPENAI_API_DEPLOYMENT_NAME.
+        :return:
+        """
+        deployment = deployment or os.environ.get("AZURE_OPENAI_API_DEPLOYMENT_NAME")
+        key = (
+            deployment,
+            model,
+            os.environ.get("AZURE_OPENAI_API_VERSION"),
+            os.environ.get("AZURE_OPENAI_API_INSTANCE_NAME"),
         )
+        client = LlmUtil._clients.get(key)
+        if client is None:
+            token_provider = LlmUtil.get_azure_credential()
+            http_client = LlmUtil.get_http_client()
+            with LlmUtil._lock:
+                client = LlmUtil._clients.get(key)
+                if client is None:
+                    client = ResilientAzureOpenAIChatCompletionClient(
+                        azure_deployment=deployment,
+                        model=model,
+                        api_version=key[2],
+                        azure_endpoint=key[3],
+                        azure_ad_token_provider=token_provider,
+                        http_client=http_client)
+                    LlmUtil._clients[key] = client
+        return client
 
     @staticmethod
-    def get_llm(model: str) -> AzureOpenAIChatCompletionClient:
+    def total_usage() -> dict[str, RequestUsage]:
         """
-        Get Azure OpenAI Chat Completion client with the necessary credentials.
+        Get the tokens used so far by each shared client, keyed by model.
+        Clients of the same model on different deployments are summed.
         :return:
         """
-        return AzureOpenAIChatCompletionClient(
-            azure_deployment=os.environ.get("AZURE_OPENAI_API_DEPLOYMENT_NAME"),
-            model=model,
-            api_version=os.environ.get("AZURE_OPENAI_API_VERSION"),
-            azure_endpoint=os.environ.get("AZURE_OPENAI_API_INSTANCE_NAME"),
-            azure_ad_token_provider=LlmUtil.get_azure_credential())
+        with LlmUtil._lock:
+            clients = list(LlmUtil._clients.items())
+        usage: dict[str, RequestUsage] = {}
+        for key, client in clients:
+            client_usage = client.total_usage()
+            total = usage.get(key[1], RequestUsage(prompt_tokens=0, completion_tokens=0))
+            usage[key[1]] = RequestUsage(prompt_tokens=total.prompt_tokens + client_usage.prompt_tokens,
+                                         completion_tokens=total.completion_tokens + client_usage.completion_tokens)
+        return usage
+
+    @staticmethod
+    async def close():
+        """
+        Close all shared clients, the HTTP connection pool and the credential.
+        """
+        with LlmUtil._lock:
+            clients = list(LlmUtil._clients.values())
+            LlmUtil._clients.clear()
+            http_client, LlmUtil._http_client = LlmUtil._http_client, None
+            credential, LlmUtil._credential = LlmUtil._credential, None
+            LlmUtil._token_provider = None
+        for client in clients:
+            await client.close()
+        if http_client is not None:
+            await http_client.aclose()
+        if credential is not None:
+            credential.close()
 
 
 async def main():
@@ -52,7 +213,7 @@ async def main():
         [UserMessage(content="What is the capital of France?", source="user")]
     )
     print(result)
-    await llm.close()
+    await LlmUtil.close()
 
 
 if __name__ == "__main__":
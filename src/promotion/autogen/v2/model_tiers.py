@@ -0,0 +1,121 @@
+"""
+Per-agent model tiers for the promotion analysis team.
+"""
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ROLES = ("selector", "planning", "database", "sql_judge", "writer")
+
+# Environment variables holding the model name and the Azure deployment of each model
+MODELS: dict[str, tuple[str, str]] = {
+    "gpt-4.1": ("AZURE_OPENAI_API_MODEL_GPT_4_1", "AZURE_OPENAI_API_DEPLOYMENT_GPT_4_1"),
+    "gpt-4.1-mini": ("AZURE_OPENAI_API_MODEL_GPT_4_1_MINI", "AZURE_OPENAI_API_DEPLOYMENT_GPT_4_1_MINI"),
+    "o4-mini": ("AZURE_OPENAI_API_MODEL_O4_MINI", "AZURE_OPENAI_API_DEPLOYMENT_O4_MINI"),
+}
+
+# Models that may run on AZURE_OPENAI_API_DEPLOYMENT_NAME when they have no deployment of their own
+_DEFAULT_DEPLOYMENT_MODELS = ("gpt-4.1", "o4-mini")
+
+# Each tier maps an agent role to a model
+TIERS: dict[str, dict[str, str]] = {
+    "quality": {
+        "selector": "gpt-4.1",
+        "planning": "gpt-4.1",
+        "database": "gpt-4.1",
+        "sql_judge": "o4-mini",
+        "writer": "gpt-4.1",
+    },
+    "balanced": {
+        "selector": "gpt-4.1-mini",
+        "planning": "gpt-4.1-mini",
+        "database": "gpt-4.1",
+        "sql_judge": "o4-mini",
+        "writer": "gpt-4.1",
+    },
+    "fast": {
+        "selector": "gpt-4.1-mini",
+        "planning": "gpt-4.1-mini",
+        "database": "gpt-4.1-mini",
+        "sql_judge": "o4-mini",
+        "writer": "gpt-4.1-mini",
+    },
+}
+
+
+class ModelDeployment:
+    """
+    A model name and the Azure deployment serving it.
+    """
+
+    def __init__(self, model: str, deployment: str):
+        self.model = model
+        self.deployment = deployment
+
+    def __repr__(self) -> str:
+        return f"{self.deployment}/{self.model}"
+
+
+class ModelTiers:
+    """
+    Resolves the model and deployment of each agent role. The tier comes from the argument or
+    MODEL_TIER (default quality), and MODEL_<ROLE>, e.g. MODEL_PLANNING=gpt-4.1-mini, overrides
+    the model of a single role. gpt-4.1 and o4-mini run on AZURE_OPENAI_API_DEPLOYMENT_NAME unless
+    they have their own deployment; gpt-4.1-mini needs its model and deployment to be configured.
+    """
+
+    @staticmethod
+    def get_tier(tier: Optional[str] = None) -> str:
+        """
+        Get the tier name, validating it against the known tiers.
+        :param tier: The tier, by default MODEL_TIER.
+        :return:
+        """
+        tier = tier or os.getenv("MODEL_TIER", "quality")
+        if tier not in TIERS:
+            raise ValueError(f"Unknown model tier {tier}, expected one of {', '.join(TIERS)}")
+        return tier
+
+    @staticmethod
+    def resolve(name: str) -> ModelDeployment:
+        """
+        Get the configured model and deployment of a model.
+        :param name: One of MODELS.
+        :return:
+        """
+        if name not in MODELS:
+            raise ValueError(f"Unknown model {name}, expected one of {', '.join(MODELS)}")
+        model_variable, deployment_variable = MODELS[name]
+        model = os.getenv(model_variable)
+        deployment = os.getenv(deployment_variable)
+        if not deployment and name in _DEFAULT_DEPLOYMENT_MODELS:
+            deployment = os.getenv("AZURE_OPENAI_API_DEPLOYMENT_NAME")
+        missing = [variable for variable, value in ((model_variable, model), (deployment_variable, deployment))
+                   if not value]
+        if missing:
+            raise ValueError(f"Model {name} is not configured, set {' and '.join(missing)}")
+        return ModelDeployment(model, deployment)
+
+    @staticmethod
+    def get_model(role: str, tier: Optional[str] = None) -> ModelDeployment:
+        """
+        Get the model and deployment for an agent role.
+        :param role: One of ROLES.
+        :param tier: The tier, by default MODEL_TIER.
+        :return:
+        """
+        if role not in ROLES:
+            raise ValueError(f"Unknown agent role {role}, expected one of {', '.join(ROLES)}")
+        return ModelTiers.resolve(os.getenv(f"MODEL_{role.upper()}") or TIERS[ModelTiers.get_tier(tier)][role])
+
+    @staticmethod
+    def get_models(tier: Optional[str] = None) -> dict[str, ModelDeployment]:
+        """
+        Get the model and deployment of every agent role.
+        :param tier: The tier, by default MODEL_TIER.
+        :return:
+        """
+        return {role: ModelTiers.get_model(role, tier) for role in ROLES}
@@ -0,0 +1,103 @@
+"""
+Benchmark of the token cost of the DatabaseAgent tool result formats.
+
+AutoGen passes a tool's dict result to the model as str(result). This script builds typical
+QUOTE_CED results, encodes them as the legacy list of row dictionaries and in each compact
+format, and counts the tokens with the GPT-4.1 tokenizer.
+
+Usage:
+    uv run src/promotion/autogen/v3/benchmark_result_format.py
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+import tiktoken
+
+from snowflake_util import SnowflakeUtil
+
+
+class StandInResult:
+    """
+    Minimal stand-in for a streamed SQL Alchemy result.
+    """
+
+    def __init__(self, columns: list[str], rows: list[tuple]):
+        self.columns = columns
+        self.rows = rows
+        self.rowcount = len(rows)
+
+    def keys(self) -> list[str]:
+        return self.columns
+
+    def partitions(self, size: int):
+        for offset in range(0, len(self.rows), size):
+            yield self.rows[offset:offset + size]
+
+    def close(self):
+        pass
+
+
+def quote_rows(count: int) -> StandInResult:
+    rng = random.Random(42)
+    columns = ["QUOTE_NUMBER", "QUOTE_DATE", "QUOTE_STATUS", "CURRENCY_CODE", "PROMOTION_ID",
+               "PROMOTION_DISCOUNT_AMOUNT", "SUB_TOTAL_AMOUNT"]
+    rows = []
+    for i in range(count):
+        rows.append((
+            f"Q{100000 + i}",
+            date(2024, 1, 1) + timedelta(days=rng.randrange(365)),
+            rng.choice(["Ordered", "Expired", "Cancelled"]),
+            rng.choice(["USD", "EUR", "GBP", "JPY", "AUD"]),
+            f"PROMO-{rng.randrange(40):04d}",
+            Decimal(f"{rng.uniform(0, 500):.2f}"),
+            Decimal(f"{rng.uniform(50, 5000):.2f}"),
+        ))
+    return StandInResult(columns, rows)
+
+
+def quarterly_rows() -> StandInResult:
+    rng = random.Random(7)
+    columns = ["QUARTER", "CURRENCY_CODE", "ORDERED_QUOTES", "TOTAL_DISCOUNT_AMOUNT"]
+    rows = []
+    for year in (2023, 2024):
+        for quarter in range(1, 5):
+            for currency in ("USD", "EUR", "GBP", "JPY", "AUD"):
+                rows.append((
+                    date(year, 3 * quarter - 2, 1),
+                    currency,
+                    Decimal(rng.randrange(100, 20000)),
+                    Decimal(f"{rng.uniform(1000, 90000):.2f}"),
+                ))
+    return StandInResult(columns, rows)
+
+
+def legacy_result(result: StandInResult) -> dict:
+    return {
+        "success": True,
+        "error": "",
+        "data": [dict(zip(result.columns, row)) for row in result.rows],
+    }
+
+
+def main():
+    encoding = tiktoken.encoding_for_model("gpt-4.1")
+    cases = {
+        "200 quote rows": quote_rows(200),
+        "1000 quote rows": quote_rows(1000),
+        "quarterly by currency": quarterly_rows(),
+    }
+    print(f"{'result':<24}{'rows':>10}{'columns':>10}{'csv':>10}{'columns saved':>16}{'csv saved':>12}")
+    for name, result in cases.items():
+        baseline = len(encoding.encode(str(legacy_result(result))))
+        fetched = SnowflakeUtil.fetch_rows(result, max_rows=len(result.rows), max_bytes=2 ** 31, fetch_size=500)
+        counts = {}
+        for result_format in ("columns", "csv"):
+            encoded = dict(SnowflakeUtil.format_result(fetched, result_format), success=True, error="")
+            counts[result_format] = len(encoding.encode(str(encoded)))
+        print(f"{name:<24}{baseline:>10}{counts['columns']:>10}{counts['csv']:>10}"
+              f"{1 - counts['columns'] / baseline:>16.0%}{1 - counts['csv'] / baseline:>12.0%}")
+
+
+if __name__ == "__main__":
+    main()
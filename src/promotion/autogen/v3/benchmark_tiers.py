@@ -0,0 +1,102 @@
+"""
+Benchmark of the model tiers on a fixed question set.
+
+Every question runs through the team of each tier. The script reports the mean and p95
+latency per question, the prompt and completion tokens per question, and how well the
+WriterAgent answers agree with those of the first tier, measured as the overlap of the
+numbers they quote. The plan and query caches are disabled so that every tier does the
+full work; set SNOWFLAKE_BACKEND=local to run the queries against the local database.
+
+Usage:
+    uv run src/promotion/autogen/v3/benchmark_tiers.py [tier ...]
+"""
+import asyncio
+import os
+import re
+import statistics
+import sys
+import time
+from typing import Optional
+
+os.environ.setdefault("PLAN_CACHE_ENABLED", "false")
+os.environ.setdefault("QUERY_CACHE_ENABLED", "false")
+
+from analyzer import Analyzer
+from llm_util import LlmUtil
+from model_tiers import TIERS
+
+QUESTIONS = [
+    "How many promotions resulted in sales?",
+    "Which country-specific promotions had the greatest impact?",
+    "Which financial quarters are the best times for promotions in different countries?",
+    "Which types of offerings were most influenced by promotions?",
+]
+
+_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+
+def total_tokens() -> tuple[int, int]:
+    usage = LlmUtil.total_usage().values()
+    return sum(u.prompt_tokens for u in usage), sum(u.completion_tokens for u in usage)
+
+
+def numbers(answer: str) -> set[str]:
+    return {number.rstrip("0").rstrip(".") if "." in number else number
+            for number in _NUMBER_PATTERN.findall(answer.replace(",", ""))}
+
+
+def agreement(answer: str, reference: str) -> Optional[float]:
+    """
+    Get the Jaccard overlap of the numbers in two answers, or None if neither has any.
+    """
+    ours, theirs = numbers(answer), numbers(reference)
+    if not ours and not theirs:
+        return None
+    return len(ours & theirs) / len(ours | theirs)
+
+
+async def run_question(tier: str, question: str) -> dict:
+    analyzer = Analyzer(tier)
+    prompt_tokens, completion_tokens = total_tokens()
+    start = time.perf_counter()
+    result = await analyzer.team.run(task=question)
+    latency = time.perf_counter() - start
+    answers = [message.to_text() for message in result.messages
+               if getattr(message, "source", None) == "WriterAgent" and hasattr(message, "to_text")]
+    prompt_after, completion_after = total_tokens()
+    return {
+        "latency": latency,
+        "prompt_tokens": prompt_after - prompt_tokens,
+        "completion_tokens": completion_after - completion_tokens,
+        "answer": answers[-1] if answers else "",
+    }
+
+
+async def main():
+    tiers = sys.argv[1:] or list(TIERS)
+    results: dict[str, list[dict]] = {}
+    try:
+        for tier in tiers:
+            results[tier] = []
+            for question in QUESTIONS:
+                print(f"[{tier}] {question}")
+                results[tier].append(await run_question(tier, question))
+    finally:
+        await LlmUtil.close()
+
+    reference = results[tiers[0]]
+    print(f"\nAgreement is measured against the {tiers[0]} tier.")
+    print(f"{'tier':<12}{'mean s':>10}{'p95 s':>10}{'prompt tok':>12}{'compl tok':>12}{'agreement':>12}")
+    for tier in tiers:
+        latencies = sorted(run["latency"] for run in results[tier])
+        p95 = latencies[min(int(0.95 * len(latencies)), len(latencies) - 1)]
+        scores = [score for run, ref in zip(results[tier], reference)
+                  if (score := agreement(run["answer"], ref["answer"])) is not None]
+        print(f"{tier:<12}{statistics.mean(latencies):>10.1f}{p95:>10.1f}"
+              f"{statistics.mean(run['prompt_tokens'] for run in results[tier]):>12.0f}"
+              f"{statistics.mean(run['completion_tokens'] for run in results[tier]):>12.0f}"
+              f"{(f'{statistics.mean(scores):.0%}' if scores else 'n/a'):>12}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
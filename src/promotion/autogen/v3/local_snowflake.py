@@ -0,0 +1,326 @@
+"""
+Local SQLite stand-in for the Snowflake EDH tables, generated from schema/*.json and filled
+with synthetic data. Set SNOWFLAKE_BACKEND=local to point SnowflakeUtil at it.
+"""
+import glob
+import json
+import math
+import os
+import random
+import re
+import sqlite3
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, Engine, event
+
+load_dotenv()
+
+SQLITE_TYPES = {
+    "VARCHAR": "TEXT",
+    "TEXT": "TEXT",
+    "NUMBER": "NUMERIC",
+    "FLOAT": "REAL",
+    "BOOLEAN": "INTEGER",
+    "DATE": "DATE",
+    "TIMESTAMP_NTZ": "TIMESTAMP",
+    "TIMESTAMP": "TIMESTAMP",
+}
+
+CURRENCIES = {"USD": 0.42, "EUR": 0.20, "GBP": 0.10, "JPY": 0.08, "AUD": 0.06, "CAD": 0.06, "INR": 0.04, "BRL": 0.04}
+TAX_RATES = {"USD": 0.07, "EUR": 0.20, "GBP": 0.20, "JPY": 0.10, "AUD": 0.10, "CAD": 0.13, "INR": 0.18, "BRL": 0.17}
+STATUS_WEIGHTS = {"Ordered": 0.30, "Expired": 0.50, "Cancelled": 0.20}
+PROMOTION_SEASONS = {1: "New Year", 2: "Winter", 3: "Spring", 4: "Spring", 5: "Summer", 6: "Summer", 7: "Summer",
+                     8: "Back to School", 9: "Fall", 10: "Fall", 11: "Black Friday", 12: "Holiday"}
+
+
+class LocalSnowflake:
+    """
+    Builds and serves a SQLite database that mimics the EDH_PUBLISH.EDH_SHARED tables.
+    Snowflake-only syntax that agents commonly generate is translated on the fly:
+    database/schema qualified table names, ILIKE, and functions such as DATE_TRUNC,
+    DATEADD, QUARTER and GETDATE.
+    """
+
+    def __init__(self, db_path: str, schema_dir: str, rows: int = 100_000, seed: int = 42, days: int = 3 * 365):
+        self.db_path = db_path
+        self.schema_dir = schema_dir
+        self.rows = rows
+        self.seed = seed
+        self.days = days
+        self.tables = {}
+        for file in sorted(glob.glob(str(Path(schema_dir) / "*.json"))):
+            with open(file, "r") as fp:
+                schema = json.load(fp)
+            self.tables[schema["table_name"].upper()] = schema["columns"]
+
+    @staticmethod
+    def find_schema_dir() -> str:
+        """
+        Get the schema directory from SCHEMA_DIR, or the schema folder of the repository.
+        :return:
+        """
+        if os.getenv("SCHEMA_DIR"):
+            return os.getenv("SCHEMA_DIR")
+        for parent in Path(__file__).resolve().parents:
+            if (parent / "schema").is_dir():
+                return str(parent / "schema")
+        return "schema"
+
+    @staticmethod
+    def from_env() -> "LocalSnowflake":
+        """
+        Create a stand-in configured with LOCAL_SNOWFLAKE_DB, LOCAL_SNOWFLAKE_ROWS,
+        LOCAL_SNOWFLAKE_SEED and SCHEMA_DIR.
+        :return:
+        """
+        return LocalSnowflake(
+            db_path=os.getenv("LOCAL_SNOWFLAKE_DB", "local_snowflake.db"),
+            schema_dir=LocalSnowflake.find_schema_dir(),
+            rows=int(os.getenv("LOCAL_SNOWFLAKE_ROWS", "100000")),
+            seed=int(os.getenv("LOCAL_SNOWFLAKE_SEED", "42")),
+        )
+
+    def build(self):
+        """
+        Create the tables from the schema files and fill them with synthetic data.
+        An existing database file is replaced.
+        """
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+        rng = random.Random(self.seed)
+        today = date.today()
+        start = today - timedelta(days=self.days)
+
+        with sqlite3.connect(self.db_path) as connection:
+            for table, columns in self.tables.items():
+                column_defs = ", ".join(
+                    f'{column["column_name"]} {SQLITE_TYPES.get(column["metadata"]["type"].upper(), "TEXT")}'
+                    for column in columns
+                )
+                connection.execute(f"CREATE TABLE {table} ({column_defs})")
+
+            promotions = self._promotions(rng, start, today)
+            self._insert(connection, "PROMOTION", promotions, rng)
+            self._insert(connection, "QUOTE_CED", self._quotes(rng, start, promotions), rng)
+            connection.execute("CREATE INDEX IF NOT EXISTS IX_QUOTE_CED_QUOTE_DATE ON QUOTE_CED (QUOTE_DATE)")
+            connection.execute("CREATE INDEX IF NOT EXISTS IX_QUOTE_CED_PROMOTION_ID ON QUOTE_CED (PROMOTION_ID)")
+
+    def get_engine(self, **engine_kwargs) -> Engine:
+        """
+        Get an SQL Alchemy engine for the stand-in, building the database on first use.
+        :param engine_kwargs: Extra keyword arguments passed to create_engine.
+        :return:
+        """
+        if not os.path.exists(self.db_path):
+            self.build()
+        connect_args = dict(engine_kwargs.pop("connect_args", {}), check_same_thread=False)
+        engine = create_engine(f"sqlite:///{self.db_path}", connect_args=connect_args, **engine_kwargs)
+        event.listen(engine, "connect", LocalSnowflake._register_functions)
+        event.listen(engine, "before_cursor_execute", self._translate, retval=True)
+        return engine
+
+    def _insert(self, connection: sqlite3.Connection, table: str, rows, rng: random.Random):
+        if table not in self.tables:
+            return
+        names = [column["column_name"] for column in self.tables[table]]
+        sql = f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+        batch = []
+        for row in rows:
+            batch.append(tuple(row[name] if name in row else self._generic_value(column, rng)
+                               for name, column in zip(names, self.tables[table])))
+            if len(batch) >= 10_000:
+                connection.executemany(sql, batch)
+                batch = []
+        if batch:
+            connection.executemany(sql, batch)
+
+    def _generic_value(self, column: dict, rng: random.Random):
+        # Columns without a dedicated generator get a plausible value for their type
+        if column.get("sample_values"):
+            return rng.choice(column["sample_values"])
+        column_type = column["metadata"]["type"].upper()
+        if column_type == "NUMBER":
+            return round(rng.uniform(0, 1000), 2)
+        if column_type == "DATE":
+            return (date.today() - timedelta(days=rng.randrange(self.days))).isoformat()
+        if column_type.startswith("TIMESTAMP"):
+            return (datetime.now() - timedelta(minutes=rng.randrange(self.days * 1440))).isoformat(sep=" ")
+        return f"{column['column_name'][:3]}-{rng.randrange(10_000):04d}"
+
+    def _promotions(self, rng: random.Random, start: date, today: date) -> list[dict]:
+        promotions = []
+        for i in range(max(20, self.rows // 2_000)):
+            percent = rng.choice([5, 10, 15, 20, 25, 30])
+            begin = start + timedelta(days=rng.randrange((today - start).days))
+            season = PROMOTION_SEASONS[begin.month] if rng.random() < 0.8 else "Flash"
+            end = begin + timedelta(days=rng.choice([7, 14, 30, 45, 60, 90]))
+            code = f"{re.sub(r'[^A-Z]', '', season.upper())[:8]}{percent}{i:03d}"
+            promotions.append({
+                "PROMOTION_ID": f"P{i:06d}",
+                "PROMOTION_CODE": code,
+                "PROMOTION_NAME": f"{season} {begin.year} - {percent}% off",
+                "PROMOTION_START_DATE": f"{begin.isoformat()} 00:00:00",
+                "PROMOTION_END_DATE": f"{end.isoformat()} 23:59:59",
+                "_percent": percent,
+                "_start": begin,
+                "_end": end,
+            })
+        return promotions
+
+    def _quotes(self, rng: random.Random, start: date, promotions: list[dict]):
+        currencies, currency_weights = list(CURRENCIES), list(CURRENCIES.values())
+        statuses, status_weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+        # Promotions indexed by start month so active promotions are found without a full scan
+        by_month = {}
+        for promotion in promotions:
+            month = promotion["_start"].replace(day=1)
+            while month <= promotion["_end"]:
+                by_month.setdefault(month, []).append(promotion)
+                month = (month + timedelta(days=32)).replace(day=1)
+
+        quote_number = 0
+        produced = 0
+        while produced < self.rows:
+            quote_number += 1
+            # More quotes towards the end of each quarter
+            day = rng.randrange(self.days)
+            quote_date = start + timedelta(days=day)
+            if quote_date.month % 3 == 0 and rng.random() < 0.3:
+                quote_date = min(quote_date + timedelta(days=rng.randrange(20)), start + timedelta(days=self.days))
+            currency = rng.choices(currencies, currency_weights)[0]
+            active = [p for p in by_month.get(quote_date.replace(day=1), [])
+                      if p["_start"] <= quote_date <= p["_end"]]
+            promotion = rng.choice(active) if active and rng.random() < 0.6 else None
+            weights = status_weights if promotion is None else [0.42, 0.42, 0.16]
+            status = rng.choices(statuses, weights)[0]
+            origin = rng.choices(["Customer", "Partner", "Sales"], [0.5, 0.2, 0.3])[0]
+            channel = "Agency" if origin == "Partner" else rng.choices(["Direct", "Agency"], [0.8, 0.2])[0]
+            platform = rng.choices(["BIC", "CPQ", "PWS"], [0.5, 0.3, 0.2])[0]
+
+            for line in range(1, 1 + min(rng.choices([1, 2, 3, 4], [0.6, 0.2, 0.12, 0.08])[0],
+                                         self.rows - produced)):
+                list_price = round(math.exp(rng.gauss(6.0, 1.0)), 2)
+                percent = promotion["_percent"] if promotion else None
+                discount = round(list_price * percent / 100, 2) if percent else 0.0
+                sub_total = round(list_price - discount, 2)
+                produced += 1
+                yield {
+                    "QUOTE_NUMBER": f"Q{quote_number:010d}",
+                    "QUOTE_DATE": quote_date.isoformat(),
+                    "LINE_ITEM_NUMBER": line,
+                    "OFFERING_ID": f"OFR-{min(int(rng.paretovariate(1.2)), 250):04d}",
+                    "QUOTE_STATUS": status,
+                    "CURRENCY_CODE": currency,
+                    "PROMOTION_ID": promotion["PROMOTION_ID"] if promotion else None,
+                    "PROMOTION_DISCOUNT_AMOUNT": discount,
+                    "PROMOTION_DISCOUNT_PERCENT": percent,
+                    "SUB_TOTAL_AMOUNT": sub_total,
+                    "TAX_AMOUNT": round(sub_total * TAX_RATES[currency], 2),
+                    "ORIGINATED_BY": origin,
+                    "SALES_CHANNEL": channel,
+                    "SALES_PLATFORM": platform,
+                }
+
+    def translate(self, statement: str) -> str:
+        """
+        Translate the Snowflake syntax of a statement to SQLite. Engines from get_engine apply it
+        to every statement; callers that execute on a raw DBAPI cursor have to apply it themselves.
+        :param statement: The SQL statement.
+        :return:
+        """
+        tables = "|".join(self.tables)
+        statement = re.sub(rf'(?:"?\w+"?\s*\.\s*){{1,2}}"?({tables})\b"?', r"\1", statement, flags=re.IGNORECASE)
+        statement = re.sub(r"\bNOT\s+ILIKE\b", "NOT LIKE", statement, flags=re.IGNORECASE)
+        statement = re.sub(r"\bILIKE\b", "LIKE", statement, flags=re.IGNORECASE)
+        # Snowflake accepts bare date parts such as DATE_TRUNC(quarter, ...)
+        statement = re.sub(r"\b(DATE_TRUNC|DATEADD|DATEDIFF)\s*\(\s*'?(\w+)'?\s*,",
+                           lambda m: f"{m.group(1)}('{m.group(2).lower()}',", statement, flags=re.IGNORECASE)
+        statement = re.sub(r"\bCURRENT_TIMESTAMP\s*\(\s*\)", "CURRENT_TIMESTAMP", statement, flags=re.IGNORECASE)
+        statement = re.sub(r"\bCURRENT_DATE\s*\(\s*\)", "CURRENT_DATE", statement, flags=re.IGNORECASE)
+        return statement
+
+    def _translate(self, conn, cursor, statement: str, parameters, context, executemany):
+        return self.translate(statement), parameters
+
+    @staticmethod
+    def _register_functions(dbapi_connection, connection_record):
+        functions = {
+            "GETDATE": (0, lambda: datetime.now().isoformat(sep=" ", timespec="seconds")),
+            "YEAR": (1, lambda value: LocalSnowflake._parse(value).year if value else None),
+            "MONTH": (1, lambda value: LocalSnowflake._parse(value).month if value else None),
+            "QUARTER": (1, lambda value: (LocalSnowflake._parse(value).month - 1) // 3 + 1 if value else None),
+            "TO_DATE": (1, lambda value: LocalSnowflake._parse(value).isoformat() if value else None),
+            "DATE_TRUNC": (2, LocalSnowflake._date_trunc),
+            "DATEADD": (3, LocalSnowflake._date_add),
+            "DATEDIFF": (3, LocalSnowflake._date_diff),
+            "IFF": (3, lambda condition, if_true, if_false: if_true if condition else if_false),
+        }
+        for name, (arguments, function) in functions.items():
+            dbapi_connection.create_function(name, arguments, function, deterministic=name != "GETDATE")
+
+    @staticmethod
+    def _parse(value) -> date:
+        return datetime.fromisoformat(str(value)).date()
+
+    @staticmethod
+    def _date_trunc(part: str, value) -> Optional[str]:
+        if value is None:
+            return None
+        day = LocalSnowflake._parse(value)
+        part = part.lower()
+        if part == "year":
+            day = day.replace(month=1, day=1)
+        elif part == "quarter":
+            day = day.replace(month=3 * ((day.month - 1) // 3) + 1, day=1)
+        elif part == "month":
+            day = day.replace(day=1)
+        elif part == "week":
+            day = day - timedelta(days=day.weekday())
+        return day.isoformat()
+
+    @staticmethod
+    def _date_add(part: str, amount: int, value) -> Optional[str]:
+        if value is None:
+            return None
+        day = LocalSnowflake._parse(value)
+        part = part.lower()
+        if part in ("year", "quarter", "month"):
+            months = amount * {"year": 12, "quarter": 3, "month": 1}[part]
+            month_index = day.year * 12 + day.month - 1 + months
+            year, month = divmod(month_index, 12)
+            return day.replace(year=year, month=month + 1, day=min(day.day, 28)).isoformat()
+        return (day + timedelta(days=amount * (7 if part == "week" else 1))).isoformat()
+
+    @staticmethod
+    def _date_diff(part: str, start, end) -> Optional[int]:
+        if start is None or end is None:
+            return None
+        first, last = LocalSnowflake._parse(start), LocalSnowflake._parse(end)
+        part = part.lower()
+        months = (last.year - first.year) * 12 + last.month - first.month
+        if part == "year":
+            return last.year - first.year
+        if part == "quarter":
+            return (last.year - first.year) * 4 + (last.month - 1) // 3 - (first.month - 1) // 3
+        if part == "month":
+            return months
+        return (last - first).days // (7 if part == "week" else 1)
+
+
+def main():
+    local = LocalSnowflake.from_env()
+    if len(sys.argv) > 1:
+        local.rows = int(sys.argv[1])
+    print(f"Building {local.db_path} with {local.rows:,} QUOTE_CED rows from {local.schema_dir}")
+    local.build()
+    with sqlite3.connect(local.db_path) as connection:
+        for table in local.tables:
+            print(table, connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0])
+
+
+if __name__ == "__main__":
+    main()
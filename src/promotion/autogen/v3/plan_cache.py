@@ -0,0 +1,120 @@
+"""
+Persistent cache of PlanningAgent task breakdowns by question.
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class PlanCache:
+    """
+    SQLite-backed cache mapping a question to the plan the PlanningAgent made for it, so that plans
+    survive across runs. Entries expire after ttl_seconds and the least recently used ones are evicted
+    beyond max_entries.
+    """
+
+    _shared: Optional["PlanCache"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, db_path: str, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 1000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS plan_cache ("
+                "key TEXT PRIMARY KEY, question TEXT, plan TEXT, created_at REAL, last_used_at REAL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def shared() -> "PlanCache":
+        """
+        Get the process-wide cache configured with PLAN_CACHE_DB, PLAN_CACHE_TTL and PLAN_CACHE_MAX_ENTRIES.
+        :return:
+        """
+        if PlanCache._shared is None:
+            with PlanCache._shared_lock:
+                if PlanCache._shared is None:
+                    PlanCache._shared = PlanCache(
+                        db_path=os.getenv("PLAN_CACHE_DB", "plan_cache.db"),
+                        ttl_seconds=float(os.getenv("PLAN_CACHE_TTL", str(7 * 24 * 3600))),
+                        max_entries=int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "1000")),
+                    )
+        return PlanCache._shared
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """
+        Check whether plan caching is enabled with PLAN_CACHE_ENABLED.
+        :return:
+        """
+        return os.getenv("PLAN_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get a cached plan.
+        :param key: The cache key.
+        :return: The plan, or None if it is missing or expired.
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT plan, created_at FROM plan_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM plan_cache WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                conn.execute("UPDATE plan_cache SET last_used_at = ? WHERE key = ?", (now, key))
+            self._stats["hits" if row is not None else "misses"] += 1
+        return row[0] if row is not None else None
+
+    def put(self, key: str, question: str, plan: str):
+        """
+        Store a plan, then remove expired entries and evict the least recently used beyond max_entries.
+        :param key: The cache key.
+        :param question: The question the plan was made for.
+        :param plan: The plan.
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO plan_cache (key, question, plan, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, question, plan, now, now),
+            )
+            conn.execute("DELETE FROM plan_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM plan_cache WHERE key IN "
+                "(SELECT key FROM plan_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM plan_cache")
+
+    def get_stats(self) -> dict:
+        """
+        Get the hit/miss counters and the number of stored plans.
+        :return:
+        """
+        with self._lock, self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM plan_cache").fetchone()[0]
+            return dict(self._stats, entries=entries)
@@ -1,20 +1,129 @@
 """
 Planning Agent for coordinating tasks between Database and Writer agents.
 """
-import os
+import hashlib
+import re
+import threading
+from typing import AsyncGenerator, Optional, Sequence
 
-from autogen_agentchat.agents import AssistantAgent
+from autogen_agentchat.agents import AssistantAgent, BaseChatAgent
+from autogen_agentchat.base import Response
+from autogen_agentchat.messages import BaseAgentEvent, BaseChatMessage, TextMessage
+from autogen_core import CancellationToken
 from dotenv import load_dotenv
 
 from llm_util import LlmUtil
+from model_tiers import ModelDeployment, ModelTiers
+from plan_cache import PlanCache
 from prompt import PLANNING_AGENT_SYSTEM_MESSAGE
 
 load_dotenv()
 
-planning_agent = AssistantAgent(
-    name="PlanningAgent",
-    model_client=LlmUtil.get_llm(os.environ.get("AZURE_OPENAI_API_MODEL_GPT_4_1")),
-    description="Planning Agent for promotion analysis. "
-                "Analyzes user requests and coordinates tasks between Database and Writer agents.",
-    system_message=PLANNING_AGENT_SYSTEM_MESSAGE,
-)
+
+class CachedPlanningAgent(BaseChatAgent):
+    """
+    Planning Agent that reuses the task breakdown of a recent identical question. The turn in which
+    a new user task arrives is answered from a persistent cache keyed on the normalized task, the
+    system prompt and the model, so a changed prompt never hits an old plan. Messages of the other
+    agents are not part of the key. Other turns, and misses, go to the wrapped agent, which also
+    receives the messages of the cached turns.
+    """
+
+    def __init__(self, agent: AssistantAgent, system_message: str, model: Optional[str], cache: PlanCache):
+        super().__init__(name=agent.name, description=agent.description)
+        self._agent = agent
+        self._cache = cache
+        self._prompt_hash = hashlib.sha256(f"{system_message}\x1f{model or ''}".encode("utf-8")).hexdigest()
+        self._pending: list[BaseChatMessage] = []
+        self._lock = threading.Lock()
+
+    @property
+    def produced_message_types(self) -> Sequence[type[BaseChatMessage]]:
+        return self._agent.produced_message_types
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        """
+        Lower-case the question, collapse whitespace and drop trailing punctuation.
+        :param question: The user question.
+        :return:
+        """
+        return re.sub(r"\s+", " ", question).strip().lower().rstrip("?.!").strip()
+
+    @staticmethod
+    def latest_task(messages: Sequence[BaseChatMessage]) -> Optional[str]:
+        """
+        Get the latest user task among the new messages, which also hold the buffered messages of the
+        other agents.
+        :param messages: The new messages.
+        :return: The task, or None if no user message arrived since the last turn.
+        """
+        return next((message.to_text() for message in reversed(messages) if message.source == "user"), None)
+
+    def _make_key(self, task: str) -> str:
+        question = CachedPlanningAgent.normalize_question(task)
+        return hashlib.sha256(f"{self._prompt_hash}\x1f{question}".encode("utf-8")).hexdigest()
+
+    async def on_messages(self, messages: Sequence[BaseChatMessage],
+                          cancellation_token: CancellationToken) -> Response:
+        response = None
+        async for item in self.on_messages_stream(messages, cancellation_token):
+            if isinstance(item, Response):
+                response = item
+        return response
+
+    async def on_messages_stream(
+            self, messages: Sequence[BaseChatMessage], cancellation_token: CancellationToken
+    ) -> AsyncGenerator[BaseAgentEvent | BaseChatMessage | Response, None]:
+        task = CachedPlanningAgent.latest_task(messages)
+        key = self._make_key(task) if task is not None else None
+        plan = self._cache.get(key) if key is not None else None
+        if plan is not None:
+            message = TextMessage(content=plan, source=self.name)
+            with self._lock:
+                self._pending.extend(messages)
+                self._pending.append(message)
+            yield Response(chat_message=message)
+            return
+
+        with self._lock:
+            forwarded, self._pending = self._pending + list(messages), []
+        async for item in self._agent.on_messages_stream(forwarded, cancellation_token):
+            if isinstance(item, Response) and key is not None and isinstance(item.chat_message, TextMessage):
+                plan = item.chat_message.content
+                self._cache.put(key, task, plan)
+            yield item
+
+    async def on_reset(self, cancellation_token: CancellationToken):
+        with self._lock:
+            self._pending = []
+        await self._agent.on_reset(cancellation_token)
+
+    def get_stats(self) -> dict:
+        """
+        Get the hit/miss counters of the plan cache.
+        :return:
+        """
+        return self._cache.get_stats()
+
+
+def create_planning_agent(model: Optional[ModelDeployment] = None) -> BaseChatAgent:
+    """
+    Create the Planning Agent.
+    :param model: The model and deployment, by default those of the planning role in the configured tier.
+    :return:
+    """
+    model = model or ModelTiers.get_model("planning")
+    agent = AssistantAgent(
+        name="PlanningAgent",
+        model_client=LlmUtil.get_llm(model.model, model.deployment),
+        description="Planning Agent for promotion analysis. "
+                    "Analyzes user requests and coordinates tasks between Database and Writer agents.",
+        system_message=PLANNING_AGENT_SYSTEM_MESSAGE,
+    )
+    # Recurring questions reuse their task breakdown instead of calling the model again. The cache
+    # is shared by all planning agents; the key includes the model, so tiers do not mix
+    if PlanCache.is_enabled():
+        return CachedPlanningAgent(agent, PLANNING_AGENT_SYSTEM_MESSAGE, repr(model), PlanCache.shared())
+    return agent
+
@@ -0,0 +1,173 @@
+"""
+In-process result cache for SQL queries with TTL expiry and size-bounded LRU eviction.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_SQL_TOKEN_PATTERN = re.compile(r"""
+    (?P<quoted>'(?:[^'\\]|\\.|'')*'|\$\$.*?\$\$|"(?:[^"]|"")*")
+  | (?P<space>(?:\s|--[^\n]*|/\*.*?\*/)+)
+""", re.VERBOSE | re.DOTALL)
+
+
+class QueryCache:
+    """
+    Thread-safe cache keyed on normalized SQL plus the Snowflake role, database and schema.
+    Entries expire after ttl_seconds; the least recently used entries are evicted once the
+    entry count or the total size exceeds its bound.
+    """
+
+    _shared: Optional["QueryCache"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    @staticmethod
+    def shared() -> "QueryCache":
+        """
+        Get the process-wide cache configured with QUERY_CACHE_MAX_ENTRIES,
+        QUERY_CACHE_MAX_BYTES and QUERY_CACHE_TTL.
+        :return:
+        """
+        if QueryCache._shared is None:
+            with QueryCache._shared_lock:
+                if QueryCache._shared is None:
+                    QueryCache._shared = QueryCache(
+                        max_entries=int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "256")),
+                        max_bytes=int(os.getenv("QUERY_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+                        ttl_seconds=float(os.getenv("QUERY_CACHE_TTL", "300")),
+                    )
+        return QueryCache._shared
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """
+        Check whether result caching is enabled with QUERY_CACHE_ENABLED.
+        :return:
+        """
+        return os.getenv("QUERY_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+    @staticmethod
+    def normalize_sql(sql: str) -> str:
+        """
+        Normalize a query so that formatting differences map to the same key.
+        Comments are removed, whitespace is collapsed, a trailing semicolon is dropped and
+        everything outside string literals and quoted identifiers is lower-cased.
+        :param sql: The SQL query.
+        :return:
+        """
+        normalized = []
+        position = 0
+        # Literals are matched first, so comment markers and whitespace inside them are kept
+        for match in _SQL_TOKEN_PATTERN.finditer(sql):
+            normalized.append(sql[position:match.start()].lower())
+            normalized.append(match.group() if match.lastgroup == "quoted" else " ")
+            position = match.end()
+        normalized.append(sql[position:].lower())
+        return "".join(normalized).strip().rstrip(";").strip()
+
+    @staticmethod
+    def make_key(sql: str, role: Optional[str] = None, database: Optional[str] = None,
+                 schema: Optional[str] = None) -> str:
+        """
+        Build a cache key for a query. Role, database and schema default to the
+        SNOWFLAKE_ROLE, SNOWFLAKE_DATABASE and SNOWFLAKE_SCHEMA settings.
+        :return:
+        """
+        parts = [
+            (role or os.getenv("SNOWFLAKE_ROLE") or "").lower(),
+            (database or os.getenv("SNOWFLAKE_DATABASE") or "").lower(),
+            (schema or os.getenv("SNOWFLAKE_SCHEMA") or "").lower(),
+            QueryCache.normalize_sql(sql),
+        ]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a cached value, or None if it is missing or expired.
+        :param key: The cache key.
+        :return:
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            stored_at, size, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self._bytes -= size
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def contains(self, key: str) -> bool:
+        """
+        Check whether a value is cached, without counting a lookup or refreshing the entry.
+        :param key: The cache key.
+        :return:
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.monotonic() - entry[0] <= self.ttl_seconds
+
+    def put(self, key: str, value: Any, size: int):
+        """
+        Store a value and evict least recently used entries beyond the bounds.
+        Values larger than the whole cache are not stored.
+        :param key: The cache key.
+        :param value: The value to cache.
+        :param size: Approximate size of the value in bytes.
+        """
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (time.monotonic(), size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        """
+        Remove all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> dict:
+        """
+        Get hit/miss counters and the current cache size.
+        :return:
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
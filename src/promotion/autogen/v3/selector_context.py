@@ -0,0 +1,160 @@
+"""
+Bounded message history for the model-based speaker selection.
+"""
+import os
+import re
+import threading
+from typing import List, Optional
+
+from autogen_core.model_context import ChatCompletionContext
+from autogen_core.models import LLMMessage
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_TOOL_RESULT_PATTERN = re.compile(r"""^\s*\{\s*['"](?:success|results)['"]:""")
+_SUCCESS_PATTERN = re.compile(r"""['"]success['"]:\s*(True|False)""")
+_ERROR_PATTERN = re.compile(r"""['"]error['"]:\s*(?:'((?:[^'\\]|\\.)+)'|"((?:[^"\\]|\\.)+)")""")
+_ROW_COUNT_PATTERN = re.compile(r"""['"]row_count['"]:\s*(\d+)""")
+_TRUNCATED_PATTERN = re.compile(r"""['"]truncated['"]:\s*True""")
+_COLUMNS_PATTERN = re.compile(r"""['"]columns['"]:\s*\[([^\]]*)\]""")
+# Lines the selector decides on, such as the SQL Judge verdict and the Writer's TERMINATE
+_SIGNAL_PATTERN = re.compile(r"^.*(?:APPROVAL STATUS|\bTERMINATE\b).*$", re.MULTILINE)
+
+
+class SelectorContext(ChatCompletionContext):
+    """
+    Model context of SelectorGroupChat that keeps the selector prompt's {history} small.
+    Tool results of the Database Agent are stored as a one-line summary of their outcome.
+    Other messages longer than max_message_chars keep their head and tail, plus any verdict or
+    TERMINATE line in between. get_messages returns the task, the latest message from the user,
+    and the last buffer_size other messages, dropping the oldest further while the estimated token
+    count exceeds max_tokens.
+    Tokens are estimated as four characters each.
+    """
+
+    def __init__(self, buffer_size: Optional[int] = None, max_tokens: Optional[int] = None,
+                 max_message_chars: Optional[int] = None, initial_messages: Optional[List[LLMMessage]] = None):
+        super().__init__(initial_messages)
+        self._buffer_size = buffer_size or int(os.getenv("SELECTOR_CONTEXT_BUFFER_SIZE", "6"))
+        self._max_tokens = max_tokens or int(os.getenv("SELECTOR_CONTEXT_MAX_TOKENS", "1500"))
+        self._max_message_chars = max_message_chars or int(os.getenv("SELECTOR_CONTEXT_MAX_MESSAGE_CHARS", "600"))
+        self._lock = threading.Lock()
+        self._stats = {"messages": 0, "tool_results_summarized": 0, "messages_cut": 0, "chars_saved": 0}
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """
+        Check whether the bounded selector history is enabled with SELECTOR_CONTEXT_ENABLED.
+        :return:
+        """
+        return os.getenv("SELECTOR_CONTEXT_ENABLED", "true").lower() in ("1", "true", "yes")
+
+    @staticmethod
+    def estimate_tokens(message: LLMMessage) -> int:
+        """
+        Estimate the tokens a message takes in the selector history.
+        :param message: The message.
+        :return:
+        """
+        return len(str(message.content)) // 4 + 4
+
+    @staticmethod
+    def summarize_tool_result(content: str) -> Optional[str]:
+        """
+        Summarize the result of a query tool call, keeping what the selector needs to pick the next speaker.
+        :param content: The message content.
+        :return: The summary, or None if the content is not a tool result.
+        """
+        if not _TOOL_RESULT_PATTERN.match(content):
+            return None
+        successes = _SUCCESS_PATTERN.findall(content)
+        if "False" in successes:
+            errors = "; ".join((single or double).strip()[:200] for single, double in _ERROR_PATTERN.findall(content))
+            return f"[Query tool result: failed - {errors or 'unknown error'}]"
+        rows = sum(int(count) for count in _ROW_COUNT_PATTERN.findall(content))
+        columns = ", ".join(column.strip(" '\"") for match in _COLUMNS_PATTERN.findall(content)
+                            for column in match.split(","))
+        truncated = ", truncated" if _TRUNCATED_PATTERN.search(content) else ""
+        return f"[Query tool result: succeeded, {rows} rows{truncated}; columns: {columns or 'none'}]"
+
+    @staticmethod
+    def cut(content: str, max_chars: int) -> str:
+        """
+        Shorten a message to its head and tail. Verdict and TERMINATE lines that fall in the
+        elided middle are kept, since the next speaker depends on them.
+        :param content: The message content.
+        :param max_chars: The number of characters kept from the head and tail together.
+        :return:
+        """
+        head, tail = content[:max_chars // 2], content[len(content) - max_chars // 2:]
+        elided = content[len(head):len(content) - len(tail)]
+        signals = [line.strip()[:200] for line in _SIGNAL_PATTERN.findall(elided)]
+        middle = "\n".join([" …[cut]…"] + signals + ["…[cut]… "]) if signals else " …[cut]… "
+        return head + middle + tail
+
+    def _compact(self, message: LLMMessage) -> LLMMessage:
+        """
+        Replace a tool result with its summary and cut other long messages.
+        """
+        if not isinstance(message.content, str) or not hasattr(message, "source"):
+            return message
+        content = message.content
+        summary = SelectorContext.summarize_tool_result(content)
+        if summary is not None:
+            compacted, stat = summary, "tool_results_summarized"
+        elif len(content) > self._max_message_chars:
+            compacted, stat = SelectorContext.cut(content, self._max_message_chars), "messages_cut"
+        else:
+            return message
+        with self._lock:
+            self._stats[stat] += 1
+            self._stats["chars_saved"] += len(content) - len(compacted)
+        return message.model_copy(update={"content": compacted})
+
+    def _task_index(self) -> int:
+        """
+        Find the task: the latest message from the user, since a team that is run again gets each new
+        question appended to the same thread. Falls back to the first message.
+        """
+        for index in range(len(self._messages) - 1, -1, -1):
+            if getattr(self._messages[index], "source", None) == "user":
+                return index
+        return 0
+
+    async def add_message(self, message: LLMMessage) -> None:
+        with self._lock:
+            self._stats["messages"] += 1
+        self._messages.append(self._compact(message))
+        # The task stays; of the other messages only the last buffer_size are kept
+        if len(self._messages) > self._buffer_size + 1:
+            task = self._task_index()
+            dropped = len(self._messages) - 1 - self._buffer_size
+            self._messages[:] = [message for index, message in enumerate(self._messages)
+                                 if index == task or index - (index > task) >= dropped]
+
+    async def get_messages(self) -> List[LLMMessage]:
+        if not self._messages:
+            return []
+        task = self._task_index()
+        recent = [index for index in range(len(self._messages)) if index != task][-self._buffer_size:]
+        budget = self._max_tokens - SelectorContext.estimate_tokens(self._messages[task])
+        kept: List[int] = []
+        for index in reversed(recent):
+            tokens = SelectorContext.estimate_tokens(self._messages[index])
+            # The latest message is always kept, it decides the next speaker
+            if kept and tokens > budget:
+                break
+            kept.append(index)
+            budget -= tokens
+        if budget >= 0:
+            kept.append(task)
+        return [self._messages[index] for index in sorted(kept)]
+
+    def get_stats(self) -> dict:
+        """
+        Get the number of messages added and how many were summarized or cut.
+        :return:
+        """
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,104 @@
+"""
+Rule-based speaker selection for the promotion analysis team.
+"""
+import os
+import re
+import threading
+from typing import Optional, Sequence
+
+from autogen_agentchat.messages import BaseAgentEvent, BaseChatMessage, ToolCallSummaryMessage
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PLANNING_AGENT = "PlanningAgent"
+DATABASE_AGENT = "DatabaseAgent"
+SQL_JUDGE_AGENT = "SqlJudgeAgent"
+WRITER_AGENT = "WriterAgent"
+
+_STATUS_PATTERN = re.compile(r"APPROVAL STATUS:\W*(APPROVED|CORRECTED|REJECTED)", re.IGNORECASE)
+_VERDICT_PATTERN = re.compile(r"\b(APPROVED|CORRECTED|REJECTED)\b")
+_SQL_PATTERN = re.compile(r"```sql|\bSELECT\b[\s\S]+\bFROM\b", re.IGNORECASE)
+_FAILED_RESULT_PATTERN = re.compile(r"""['"]success['"]:\s*False""")
+
+
+class SpeakerSelector:
+    """
+    Selector function implementing the fixed workflow
+    Planning -> Database (create) -> SqlJudge (validate) -> Database (execute) -> Writer
+    as a state machine over the source and content of the last message. States it cannot decide,
+    such as a failed execution or an unrecognized verdict, return None so that SelectorGroupChat
+    falls back to the model-based selection.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {"decided": 0, "fallbacks": 0}
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """
+        Check whether rule-based selection is enabled with SELECTOR_RULES_ENABLED.
+        :return:
+        """
+        return os.getenv("SELECTOR_RULES_ENABLED", "true").lower() in ("1", "true", "yes")
+
+    @staticmethod
+    def get_verdict(content: str) -> Optional[str]:
+        """
+        Get the SQL Judge verdict from its response.
+        :param content: The SQL Judge message.
+        :return: APPROVED, CORRECTED, REJECTED or None if there is no single clear verdict.
+        """
+        match = _STATUS_PATTERN.search(content)
+        if match:
+            return match.group(1).upper()
+        verdicts = set(_VERDICT_PATTERN.findall(content))
+        return verdicts.pop() if len(verdicts) == 1 else None
+
+    @staticmethod
+    def next_speaker(messages: Sequence[BaseAgentEvent | BaseChatMessage]) -> Optional[str]:
+        """
+        Decide the next speaker from the conversation so far.
+        :param messages: The messages and events of the group chat thread.
+        :return: The name of the next agent, or None to let the model decide.
+        """
+        chat_messages = [message for message in messages if isinstance(message, BaseChatMessage)]
+        if not chat_messages:
+            return PLANNING_AGENT
+        last = chat_messages[-1]
+        content = last.to_text()
+
+        if last.source == "user":
+            return PLANNING_AGENT
+        if last.source == PLANNING_AGENT:
+            return DATABASE_AGENT
+        if last.source == DATABASE_AGENT:
+            if isinstance(last, ToolCallSummaryMessage):
+                # A failed or too expensive execution needs a revised query, which the model handles
+                return None if _FAILED_RESULT_PATTERN.search(content) else WRITER_AGENT
+            return SQL_JUDGE_AGENT if _SQL_PATTERN.search(content) else None
+        if last.source == SQL_JUDGE_AGENT:
+            verdict = SpeakerSelector.get_verdict(content)
+            if verdict in ("APPROVED", "CORRECTED"):
+                return DATABASE_AGENT
+            if verdict == "REJECTED":
+                return PLANNING_AGENT
+        return None
+
+    def __call__(self, messages: Sequence[BaseAgentEvent | BaseChatMessage]) -> Optional[str]:
+        speaker = SpeakerSelector.next_speaker(messages)
+        with self._lock:
+            self._stats["decided" if speaker is not None else "fallbacks"] += 1
+        return speaker
+
+    def get_stats(self) -> dict:
+        """
+        Get the number of turns decided by the rules and handed to the model.
+        :return:
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        turns = stats["decided"] + stats["fallbacks"]
+        stats["fallback_rate"] = stats["fallbacks"] / turns if turns else 0.0
+        return stats
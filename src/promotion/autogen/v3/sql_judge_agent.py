@@ -1,21 +1,152 @@
 """
-Writer Agent for promotion analysis. Transforms data into clear
-business insights and actionable recommendations.
+SQL Judge Agent for Snowflake databases. Reviews, validates, and corrects
+SQL queries from Database Agent before execution.
 """
 import os
+import re
+import threading
+import time
+from typing import AsyncGenerator, Optional, Sequence
 
-from autogen_agentchat.agents import AssistantAgent
+from autogen_agentchat.agents import AssistantAgent, BaseChatAgent
+from autogen_agentchat.base import Response
+from autogen_agentchat.messages import BaseAgentEvent, BaseChatMessage, TextMessage
+from autogen_core import CancellationToken
 from dotenv import load_dotenv
 
 from llm_util import LlmUtil
+from model_tiers import ModelDeployment, ModelTiers
 from prompt import SQL_JUDGE_AGENT_SYSTEM_MESSAGE
+from sql_validator import SqlValidator, ValidationResult
 
 load_dotenv()
 
-sql_judge_agent = AssistantAgent(
-    name="SqlJudgeAgent",
-    model_client=LlmUtil.get_llm(os.environ.get("AZURE_OPENAI_API_MODEL_O4_MINI")),
-    description="SQL Judge Agent for Snowflake databases. "
-                "Reviews, validates, and corrects SQL queries from Database Agent before execution.",
-    system_message=SQL_JUDGE_AGENT_SYSTEM_MESSAGE,
-)
+_SQL_BLOCK_PATTERN = re.compile(r"```sql\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+
+
+class StaticSqlJudge(BaseChatAgent):
+    """
+    SQL Judge that answers from the static SqlValidator when it can decide, in the response format
+    of the model-based judge, and hands the turn to the wrapped judge agent otherwise. Messages seen
+    while deciding statically are forwarded to the wrapped agent on its next turn, so its context
+    stays complete.
+    """
+
+    def __init__(self, judge: AssistantAgent, validator: SqlValidator):
+        super().__init__(name=judge.name, description=judge.description)
+        self._judge = judge
+        self._validator = validator
+        self._pending: list[BaseChatMessage] = []
+        self._lock = threading.Lock()
+        self._stats = {"static": 0, "fallbacks": 0, "static_seconds": 0.0, "llm_seconds": 0.0}
+
+    @property
+    def produced_message_types(self) -> Sequence[type[BaseChatMessage]]:
+        return self._judge.produced_message_types
+
+    @staticmethod
+    def extract_queries(messages: Sequence[BaseChatMessage]) -> list[str]:
+        """
+        Get the SQL code blocks of the latest Database Agent message.
+        :param messages: The new messages.
+        :return:
+        """
+        for message in reversed(messages):
+            if message.source == "DatabaseAgent":
+                return [query.strip() for query in _SQL_BLOCK_PATTERN.findall(message.to_text()) if query.strip()]
+        return []
+
+    def _static_response(self, queries: list[str]) -> Optional[str]:
+        """
+        Build the judge response from the static validation, or None if any query is undecided.
+        """
+        results: list[ValidationResult] = [self._validator.validate(query) for query in queries]
+        if not results or not all(result.decided for result in results):
+            return None
+        if any(result.status == "REJECTED" for result in results):
+            issues = "; ".join(issue for result in results for issue in result.issues)
+            return (f"**QUERY ANALYSIS:** {issues}\n"
+                    f"**APPROVAL STATUS:** REJECTED - Query has fundamental issues that cannot be resolved.")
+        if all(result.status == "APPROVED" for result in results):
+            return ("**QUERY ANALYSIS:** Query is syntactically correct and logically sound.\n"
+                    "**APPROVAL STATUS:** APPROVED - Database Agent, please execute this query as-is.")
+        issues = "\n".join(f"- {issue}" for result in results for issue in result.issues)
+        corrected = "\n\n".join(f"```sql\n{result.sql}\n```" for result in results)
+        heading = "CORRECTED QUERY" if len(results) == 1 else "CORRECTED QUERIES"
+        target = "query above" if len(results) == 1 else "queries above"
+        return (f"**QUERY ANALYSIS:**\n{issues}\n\n**{heading}:**\n{corrected}\n\n"
+                f"**APPROVAL STATUS:** CORRECTED - Database Agent, please execute the corrected {target}.")
+
+    async def on_messages(self, messages: Sequence[BaseChatMessage],
+                          cancellation_token: CancellationToken) -> Response:
+        response = None
+        async for item in self.on_messages_stream(messages, cancellation_token):
+            if isinstance(item, Response):
+                response = item
+        return response
+
+    async def on_messages_stream(
+            self, messages: Sequence[BaseChatMessage], cancellation_token: CancellationToken
+    ) -> AsyncGenerator[BaseAgentEvent | BaseChatMessage | Response, None]:
+        start = time.perf_counter()
+        content = self._static_response(StaticSqlJudge.extract_queries(messages))
+        static_seconds = time.perf_counter() - start
+        if content is not None:
+            message = TextMessage(content=content, source=self.name)
+            with self._lock:
+                self._pending.extend(messages)
+                self._pending.append(message)
+                self._stats["static"] += 1
+                self._stats["static_seconds"] += static_seconds
+            yield Response(chat_message=message)
+            return
+
+        with self._lock:
+            forwarded, self._pending = self._pending + list(messages), []
+        start = time.perf_counter()
+        async for item in self._judge.on_messages_stream(forwarded, cancellation_token):
+            yield item
+        with self._lock:
+            self._stats["fallbacks"] += 1
+            self._stats["llm_seconds"] += time.perf_counter() - start
+
+    async def on_reset(self, cancellation_token: CancellationToken):
+        with self._lock:
+            self._pending = []
+        await self._judge.on_reset(cancellation_token)
+
+    def get_stats(self) -> dict:
+        """
+        Get how often the model judge was needed and the latency saved by static decisions,
+        estimated from the average latency of the model judge.
+        :return:
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        turns = stats["static"] + stats["fallbacks"]
+        stats["fallback_rate"] = stats["fallbacks"] / turns if turns else 0.0
+        average_llm = stats["llm_seconds"] / stats["fallbacks"] if stats["fallbacks"] else None
+        stats["latency_saved_seconds"] = (stats["static"] * average_llm - stats["static_seconds"]
+                                          if average_llm is not None else None)
+        return stats
+
+
+def create_sql_judge_agent(model: Optional[ModelDeployment] = None) -> BaseChatAgent:
+    """
+    Create the SQL Judge Agent.
+    :param model: The model, by default the SQL judge model of the configured tier.
+    :return:
+    """
+    model = model or ModelTiers.get_model("sql_judge")
+    agent = AssistantAgent(
+        name="SqlJudgeAgent",
+        model_client=LlmUtil.get_llm(model.model, model.deployment),
+        description="SQL Judge Agent for Snowflake databases. "
+                    "Reviews, validates, and corrects SQL queries from Database Agent before execution.",
+        system_message=SQL_JUDGE_AGENT_SYSTEM_MESSAGE,
+    )
+    # The static validator answers the mechanical checks; the model judge only sees queries it cannot decide
+    if os.getenv("SQL_STATIC_JUDGE_ENABLED", "true").lower() in ("1", "true", "yes"):
+        return StaticSqlJudge(agent, SqlValidator.shared())
+    return agent
+
@@ -0,0 +1,563 @@
+"""
+Static validation and correction of generated Snowflake SQL against the schema files.
+"""
+import glob
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SCHEMA_PATH = ["EDH_PUBLISH", "EDH_SHARED"]
+
+_TOKEN_PATTERN = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<string>'(?:[^']|'')*')
+  | (?P<qident>"(?:[^"]|"")*")
+  | (?P<number>\d+(?:\.\d+)?)
+  | (?P<word>[A-Za-z_][A-Za-z0-9_$]*)
+  | (?P<op><>|!=|<=|>=|\|\||::|[(),.;*=<>+\-/%:\[\]])
+""", re.VERBOSE | re.DOTALL)
+
+KEYWORDS = {
+    "SELECT", "FROM", "WHERE", "AND", "OR", "NOT", "NULL", "IS", "IN", "AS", "ON", "JOIN", "INNER", "LEFT",
+    "RIGHT", "FULL", "OUTER", "CROSS", "NATURAL", "USING", "GROUP", "BY", "ORDER", "HAVING", "LIMIT", "OFFSET",
+    "QUALIFY", "DISTINCT", "ALL", "ANY", "SOME", "EXISTS", "BETWEEN", "LIKE", "ILIKE", "RLIKE", "ESCAPE", "CASE",
+    "WHEN", "THEN", "ELSE", "END", "ASC", "DESC", "NULLS", "FIRST", "LAST", "TRUE", "FALSE", "WITH", "UNION",
+    "INTERSECT", "EXCEPT", "MINUS", "TOP", "FETCH", "NEXT", "ROWS", "ROW", "ONLY", "OVER", "PARTITION", "WINDOW",
+    "RANGE", "UNBOUNDED", "PRECEDING", "FOLLOWING", "CURRENT", "INTERVAL", "DATE", "TIMESTAMP", "TIME",
+    "CURRENT_DATE", "CURRENT_TIMESTAMP", "CURRENT_TIME", "SYSDATE", "LATERAL", "SAMPLE", "TABLESAMPLE", "SYSTEM",
+    "BERNOULLI", "BLOCK", "WITHIN", "RECURSIVE", "YEAR", "YEARS", "QUARTER", "QUARTERS", "MONTH", "MONTHS", "WEEK",
+    "WEEKS", "DAY", "DAYS", "DAYOFWEEK", "DAYOFYEAR", "HOUR", "HOURS", "MINUTE", "MINUTES", "SECOND", "SECONDS",
+    "VARCHAR", "STRING", "TEXT", "CHAR", "NUMBER", "NUMERIC", "DECIMAL", "INT", "INTEGER", "BIGINT", "FLOAT",
+    "DOUBLE", "REAL", "BOOLEAN", "VARIANT",
+}
+AGGREGATES = {
+    "COUNT", "SUM", "AVG", "MIN", "MAX", "MEDIAN", "MODE", "STDDEV", "STDDEV_POP", "STDDEV_SAMP", "VARIANCE",
+    "VAR_POP", "VAR_SAMP", "LISTAGG", "ARRAY_AGG", "OBJECT_AGG", "ANY_VALUE", "COUNT_IF", "SUM_IF", "AVG_IF",
+    "APPROX_COUNT_DISTINCT", "APPROX_PERCENTILE", "PERCENTILE_CONT", "PERCENTILE_DISC", "BOOLAND_AGG",
+    "BOOLOR_AGG", "HLL",
+}
+CLAUSE_ENDS = {"WHERE", "GROUP", "HAVING", "ORDER", "LIMIT", "QUALIFY", "UNION", "INTERSECT", "EXCEPT", "MINUS",
+               "OFFSET", "FETCH", "WINDOW"}
+JOIN_WORDS = {"JOIN", "INNER", "LEFT", "RIGHT", "FULL", "OUTER", "CROSS", "NATURAL", "ON", "USING"}
+
+
+class Token:
+    def __init__(self, kind: str, text: str):
+        self.kind = kind
+        self.text = text
+
+    @property
+    def upper(self) -> str:
+        return self.text.upper() if self.kind == "word" else self.text
+
+
+class TableRef:
+    def __init__(self, parts: list[str], start: int, end: int, subquery: bool = False):
+        self.parts = parts
+        self.start = start
+        self.end = end
+        self.subquery = subquery
+        self.alias: Optional[str] = None
+        self.alias_end = end
+
+    @property
+    def name(self) -> str:
+        return self.parts[-1] if self.parts else ""
+
+
+class ValidationResult:
+    """
+    Outcome of a static validation.
+    status is APPROVED, CORRECTED, REJECTED or UNDECIDED; sql holds the corrected query when CORRECTED,
+    issues the problems that were found and reasons why the validator could not decide.
+    """
+
+    def __init__(self, status: str, sql: str, issues: list[str], reasons: list[str]):
+        self.status = status
+        self.sql = sql
+        self.issues = issues
+        self.reasons = reasons
+
+    @property
+    def decided(self) -> bool:
+        return self.status != "UNDECIDED"
+
+
+class SqlValidator:
+    """
+    Checks the rules of the SQL Judge that do not need a model: tables qualified with
+    edh_publish.edh_shared, explicit JOINs instead of comma joins, columns that exist in the schema
+    files and GROUP BY consistency. Qualification, comma joins with an equality join predicate and
+    missing GROUP BY expressions are corrected. Anything the token-level analysis cannot resolve,
+    such as columns of derived tables, ambiguous or correlated columns, window functions in grouped
+    queries or unknown identifiers, makes the result UNDECIDED.
+    """
+
+    _shared: Optional["SqlValidator"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, schema_dir: str):
+        self.tables: dict[str, set[str]] = {}
+        for f in glob.glob(str(Path(schema_dir) / "*.json")):
+            with open(f, "r") as fp:
+                schema = json.load(fp)
+            self.tables[schema["table_name"].upper()] = {c["column_name"].upper() for c in schema.get("columns", [])}
+
+    @staticmethod
+    def find_schema_dir() -> str:
+        """
+        Get the schema directory from SCHEMA_DIR, or the schema folder of the repository.
+        :return:
+        """
+        if os.getenv("SCHEMA_DIR"):
+            return os.getenv("SCHEMA_DIR")
+        for parent in Path(__file__).resolve().parents:
+            if (parent / "schema").is_dir():
+                return str(parent / "schema")
+        return "schema"
+
+    @staticmethod
+    def shared() -> "SqlValidator":
+        """
+        Get the process-wide validator for the schema directory.
+        :return:
+        """
+        if SqlValidator._shared is None:
+            with SqlValidator._shared_lock:
+                if SqlValidator._shared is None:
+                    SqlValidator._shared = SqlValidator(SqlValidator.find_schema_dir())
+        return SqlValidator._shared
+
+    @staticmethod
+    def tokenize(sql: str) -> list[Token]:
+        tokens = []
+        position = 0
+        while position < len(sql):
+            match = _TOKEN_PATTERN.match(sql, position)
+            if match is None:
+                tokens.append(Token("other", sql[position]))
+                position += 1
+                continue
+            tokens.append(Token(match.lastgroup, match.group()))
+            position = match.end()
+        return tokens
+
+    def validate(self, sql: str) -> ValidationResult:
+        """
+        Validate a query and correct the issues that have a mechanical fix.
+        :param sql: The SQL query.
+        :return:
+        """
+        tokens = SqlValidator.tokenize(sql)
+        sig = [i for i, token in enumerate(tokens) if token.kind not in ("ws", "comment")]
+        issues: list[str] = []
+        reasons: list[str] = []
+        if not sig or tokens[sig[0]].upper not in ("SELECT", "WITH"):
+            return ValidationResult("REJECTED", sql, ["Only SELECT queries can be executed"], [])
+        if any(tokens[i].kind == "other" for i in sig):
+            reasons.append("Unrecognized characters in the query")
+        semicolons = [k for k, i in enumerate(sig) if tokens[i].text == ";"]
+        if semicolons and semicolons[0] != len(sig) - 1:
+            reasons.append("Multiple statements")
+        if reasons:
+            return ValidationResult("UNDECIDED", sql, issues, reasons)
+
+        analysis = _Analysis(tokens, sig)
+        analysis.parse()
+        reasons.extend(analysis.reasons)
+
+        self._check_qualification(analysis, issues, reasons)
+        self._check_columns(analysis, reasons)
+        self._fix_comma_joins(analysis, issues, reasons)
+        self._check_group_by(analysis, issues, reasons)
+
+        if reasons:
+            return ValidationResult("UNDECIDED", sql, issues, reasons)
+        if issues:
+            return ValidationResult("CORRECTED", "".join(token.text for token in tokens), issues, [])
+        return ValidationResult("APPROVED", sql, [], [])
+
+    def _check_qualification(self, analysis: "_Analysis", issues: list[str], reasons: list[str]):
+        for ref in analysis.refs:
+            if ref.subquery:
+                continue
+            parts = [part.upper() for part in ref.parts]
+            if len(parts) == 1 and parts[0] in analysis.cte_names:
+                continue
+            if ref.name.upper() not in self.tables:
+                reasons.append(f"Unknown table {'.'.join(ref.parts)}")
+                continue
+            if parts != SCHEMA_PATH + [ref.name.upper()]:
+                qualified = f"edh_publish.edh_shared.{ref.name}"
+                analysis.replace(ref.start, ref.end, qualified)
+                issues.append(f"Qualified {'.'.join(ref.parts)} as {qualified}")
+
+    def _columns_of(self, refs: list[TableRef]) -> dict[str, Optional[set[str]]]:
+        """
+        Map table names and aliases to their columns; derived tables and CTEs map to None.
+        """
+        sources: dict[str, Optional[set[str]]] = {}
+        for ref in refs:
+            columns = None if ref.subquery else self.tables.get(ref.name.upper())
+            if not ref.subquery:
+                sources[ref.name.upper()] = columns
+            if ref.alias:
+                sources[ref.alias.upper()] = columns
+        return sources
+
+    def _check_columns(self, analysis: "_Analysis", reasons: list[str]):
+        """
+        Resolve every column against the FROM and JOIN sources of its own query block. Columns that
+        are ambiguous there, or only resolve in an enclosing block, are left to the judge.
+        """
+        scopes: dict[Optional[int], list[TableRef]] = {}
+        for ref in analysis.refs:
+            scopes.setdefault(analysis.block_of(ref.start), []).append(ref)
+        all_sources = set().union(*(self._columns_of(refs) for refs in scopes.values()))
+        tokens, sig = analysis.tokens, analysis.sig
+        for k, i in enumerate(sig):
+            token = tokens[i]
+            if token.kind != "word" or k in analysis.ref_positions:
+                continue
+            previous = tokens[sig[k - 1]].text if k > 0 else ""
+            following = tokens[sig[k + 1]].text if k + 1 < len(sig) else ""
+            if previous in (".", "::") or following == "(":
+                continue
+            block = analysis.block_of(k)
+            refs = scopes.get(block, [])
+            outer = [self._columns_of(scopes.get(b, [])) for b in analysis.outer_blocks(block)]
+            if following == ".":
+                column = tokens[sig[k + 2]] if k + 2 < len(sig) else None
+                sources = self._columns_of(refs)
+                if token.upper not in sources:
+                    if any(token.upper in scope for scope in outer):
+                        reasons.append(f"{token.text} only resolves in an enclosing query")
+                    else:
+                        reasons.append(f"Unknown table or alias {token.text}")
+                elif column is not None and column.kind == "word" and sources[token.upper] is not None \
+                        and column.upper not in sources[token.upper]:
+                    reasons.append(f"Unknown column {token.text}.{column.text}")
+                continue
+            name = token.upper
+            if name in KEYWORDS or name in AGGREGATES or name in analysis.select_aliases.get(block, ()) \
+                    or name in analysis.cte_names or name in all_sources or previous.upper() == "AS":
+                continue
+            matches = [ref for ref in refs if not ref.subquery and name in self.tables.get(ref.name.upper(), ())]
+            unresolved = any(ref.subquery or ref.name.upper() not in self.tables for ref in refs)
+            if len(matches) > 1:
+                reasons.append(f"Ambiguous column {token.text}")
+            elif unresolved:
+                reasons.append(f"Cannot resolve {token.text} against a derived table")
+            elif not matches:
+                if any(name in columns for scope in outer for columns in scope.values() if columns):
+                    reasons.append(f"Column {token.text} only resolves in an enclosing query")
+                else:
+                    reasons.append(f"Unknown column {token.text}")
+
+    def _fix_comma_joins(self, analysis: "_Analysis", issues: list[str], reasons: list[str]):
+        for ref, comma in analysis.comma_joins:
+            names = {ref.name.upper()} | ({ref.alias.upper()} if ref.alias else set())
+            predicate = analysis.find_join_predicate(ref, names)
+            if predicate is None:
+                reasons.append(f"Comma join of {ref.name} without an equality join predicate")
+                continue
+            condition, start, end = predicate
+            analysis.remove_predicate(start, end)
+            analysis.replace(comma, comma, "")
+            tokens, sig = analysis.tokens, analysis.sig
+            tokens[sig[ref.start]].text = "JOIN " + tokens[sig[ref.start]].text
+            tokens[sig[ref.alias_end]].text += f" ON {condition}"
+            issues.append(f"Replaced the comma join of {ref.name} with an explicit JOIN ON {condition}")
+
+    def _check_group_by(self, analysis: "_Analysis", issues: list[str], reasons: list[str]):
+        select = analysis.main_select
+        if select is None:
+            return
+        items, group_items, group_end, insert_at = select
+        if any(item["star"] for item in items):
+            if group_items is not None or any(item["aggregate"] for item in items):
+                reasons.append("SELECT * in an aggregate query")
+            return
+        aggregated = group_items is not None or any(item["aggregate"] for item in items)
+        if not aggregated:
+            return
+        if any(item["window"] for item in items):
+            reasons.append("Window functions in an aggregate query")
+            return
+        if group_items is not None and "ALL" in group_items:
+            return
+        grouped = set(group_items or [])
+        missing = []
+        for position, item in enumerate(items, start=1):
+            if item["aggregate"] or item["constant"]:
+                continue
+            keys = {item["expr"], item["bare"], str(position)} | ({item["alias"]} if item["alias"] else set())
+            if not keys & grouped:
+                missing.append(item["text"])
+        if not missing:
+            return
+        if group_items is None:
+            analysis.append_after(insert_at, f" GROUP BY {', '.join(missing)}")
+        else:
+            analysis.append_after(group_end, f", {', '.join(missing)}")
+        issues.append(f"Added {', '.join(missing)} to GROUP BY")
+
+
+class _Analysis:
+    """
+    Token-level structure of a query: table references, comma joins, CTE names, select aliases
+    and the select list of the main query.
+    """
+
+    def __init__(self, tokens: list[Token], sig: list[int]):
+        self.tokens = tokens
+        self.sig = sig
+        self.depths = []
+        depth = 0
+        for i in sig:
+            if tokens[i].text == ")":
+                depth -= 1
+            self.depths.append(depth)
+            if tokens[i].text == "(":
+                depth += 1
+        self.refs: list[TableRef] = []
+        self.ref_positions: set[int] = set()
+        self.comma_joins: list[tuple[TableRef, int]] = []
+        self.cte_names: set[str] = set()
+        # Query blocks as (SELECT position, last position, depth), and the select aliases of each block
+        self.blocks: list[tuple[int, int, int]] = []
+        self.select_aliases: dict[int, set[str]] = {}
+        self.main_select = None
+        self.reasons: list[str] = []
+
+    def word(self, k: int) -> str:
+        return self.tokens[self.sig[k]].upper if k < len(self.sig) else ""
+
+    def text(self, k: int) -> str:
+        return self.tokens[self.sig[k]].text if k < len(self.sig) else ""
+
+    def replace(self, start: int, end: int, text: str):
+        self.tokens[self.sig[start]].text = text
+        for i in range(self.sig[start] + 1, self.sig[end] + 1):
+            self.tokens[i].text = ""
+
+    def append_after(self, k: int, text: str):
+        self.tokens[self.sig[k]].text += text
+
+    def source_text(self, start: int, end: int) -> str:
+        return "".join(self.tokens[i].text for i in range(self.sig[start], self.sig[end] + 1)).strip()
+
+    def matching(self, k: int) -> int:
+        """Position of the parenthesis closing the one at k."""
+        depth = self.depths[k]
+        for j in range(k + 1, len(self.sig)):
+            if self.text(j) == ")" and self.depths[j] == depth:
+                return j
+        return len(self.sig) - 1
+
+    def kind(self, k: int) -> str:
+        return self.tokens[self.sig[k]].kind if k < len(self.sig) else ""
+
+    def block_of(self, k: int) -> Optional[int]:
+        """Index of the innermost query block containing position k."""
+        return next((b for b in range(len(self.blocks) - 1, -1, -1)
+                     if self.blocks[b][0] <= k <= self.blocks[b][1]), None)
+
+    def outer_blocks(self, block: Optional[int]) -> list[int]:
+        """Indexes of the query blocks enclosing a block, such as the query of a subquery."""
+        if block is None:
+            return []
+        start, _, depth = self.blocks[block]
+        return [b for b, (first, last, outer_depth) in enumerate(self.blocks)
+                if outer_depth < depth and first <= start <= last]
+
+    def parse(self):
+        open_select: dict[int, bool] = {}
+        self._parse_ctes()
+        for k in range(len(self.sig)):
+            word, depth = self.word(k), self.depths[k]
+            if word in ("UNION", "INTERSECT", "EXCEPT", "MINUS") and depth == 0:
+                self.reasons.append("Set operations are not checked statically")
+            if word == "SELECT":
+                open_select[depth] = True
+                end = next((j - 1 for j in range(k + 1, len(self.sig)) if self.depths[j] < depth), len(self.sig) - 1)
+                self.blocks.append((k, end, depth))
+                self._parse_select_list(k)
+            elif word == "FROM" and open_select.get(depth):
+                self._parse_refs(k + 1, allow_commas=True)
+            elif word == "JOIN":
+                self._parse_refs(k + 1, allow_commas=False)
+            elif self.text(k) == ")":
+                open_select[depth + 1] = False
+
+    def _parse_ctes(self):
+        """Collect the CTE names of a WITH clause."""
+        if self.word(0) != "WITH":
+            return
+        k = 1
+        if self.word(k) == "RECURSIVE":
+            self.reasons.append("Recursive CTEs are not checked statically")
+            k += 1
+        while k < len(self.sig):
+            if self.word(k + 1) != "AS" or self.text(k + 2) != "(":
+                self.reasons.append("CTE column lists are not checked statically")
+                return
+            self.cte_names.add(self.word(k))
+            k = self.matching(k + 2) + 1
+            if self.text(k) != ",":
+                break
+            k += 1
+
+    def _parse_refs(self, k: int, allow_commas: bool):
+        comma = None
+        while k < len(self.sig):
+            start = k
+            if self.text(k) == "(":
+                ref = TableRef([], start, self.matching(k), subquery=True)
+            else:
+                parts = [self.text(k)]
+                while self.text(k + 1) == "." and k + 2 < len(self.sig):
+                    k += 2
+                    parts.append(self.text(k))
+                if self.text(k + 1) == "(":
+                    self.reasons.append(f"Table function {'.'.join(parts)} is not checked statically")
+                    return
+                ref = TableRef(parts, start, k)
+                self.ref_positions.update(range(start, k + 1))
+            k = ref.end + 1
+            if self.word(k) == "AS":
+                k += 1
+            if self.kind(k) == "word" and self.word(k) not in KEYWORDS:
+                ref.alias = self.text(k)
+                ref.alias_end = k
+                self.ref_positions.add(k)
+                k += 1
+            self.refs.append(ref)
+            if comma is not None:
+                self.comma_joins.append((ref, comma))
+            if allow_commas and self.text(k) == "," and self.depths[k] == self.depths[start]:
+                comma = k
+                k += 1
+                continue
+            break
+
+    def _parse_select_list(self, k: int):
+        depth, select = self.depths[k], len(self.blocks) - 1
+        k += 1
+        if self.word(k) in ("DISTINCT", "ALL"):
+            k += 1
+        if self.word(k) == "TOP":
+            k += 2
+        items = []
+        start = k
+        while k < len(self.sig):
+            if self.depths[k] < depth or (self.depths[k] == depth and (self.text(k) in (",", ";")
+                                                                        or self.word(k) == "FROM")):
+                items.append(self._select_item(start, k - 1, select))
+                if self.text(k) != "," or self.depths[k] < depth:
+                    break
+                start = k + 1
+            k += 1
+        else:
+            items.append(self._select_item(start, k - 1, select))
+        if depth == 0 and self.main_select is None:
+            self.main_select = (items,) + self._group_by(k, depth)
+
+    def _select_item(self, start: int, end: int, block: int) -> dict:
+        alias = None
+        expr_end = end
+        if end > start and self.kind(end) == "word" and self.word(end) not in KEYWORDS \
+                and self.text(end - 1) not in (".", "::"):
+            previous = self.word(end - 1)
+            if previous == "AS" or self.kind(end - 1) in ("word", "qident", "number", "string") \
+                    or self.text(end - 1) == ")":
+                alias = self.word(end)
+                expr_end = end - 2 if previous == "AS" else end - 1
+        if alias:
+            self.select_aliases.setdefault(block, set()).add(alias)
+        words = [(j, self.word(j)) for j in range(start, expr_end + 1) if self.kind(j) == "word"]
+        expr = "".join(self.word(j) for j in range(start, expr_end + 1))
+        return {
+            "text": self.source_text(start, expr_end),
+            "expr": expr,
+            "bare": re.sub(r"\b\w+\.", "", expr),
+            "alias": alias,
+            "aggregate": any(word in AGGREGATES and self.text(j + 1) == "(" for j, word in words),
+            "window": any(word == "OVER" for _, word in words),
+            "constant": all(word in KEYWORDS or self.text(j + 1) == "(" for j, word in words),
+            "star": self.text(expr_end) == "*" and (expr_end == start or self.text(expr_end - 1) == "."),
+        }
+
+    def _group_by(self, k: int, depth: int) -> tuple[Optional[list[str]], int, int]:
+        """
+        Find the GROUP BY list of the select whose select list ends at k.
+        :return: The normalized group expressions (None without GROUP BY), the position of the last
+            group expression, and the position after which a missing GROUP BY would be inserted.
+        """
+        insert_at = len(self.sig) - 1
+        if self.text(insert_at) == ";":
+            insert_at -= 1
+        for j in range(k, len(self.sig)):
+            if self.depths[j] < depth:
+                return None, j - 1, j - 1
+            if self.depths[j] != depth:
+                continue
+            if self.word(j) == "GROUP" and self.word(j + 1) == "BY":
+                groups, start, m = [], j + 2, j + 2
+                while m < len(self.sig):
+                    at_depth = self.depths[m] == depth
+                    if self.depths[m] < depth or (at_depth and (self.word(m) in CLAUSE_ENDS or self.text(m) == ";")):
+                        break
+                    if at_depth and self.text(m) == ",":
+                        groups.append("".join(self.word(x) for x in range(start, m)))
+                        start = m + 1
+                    m += 1
+                groups.append("".join(self.word(x) for x in range(start, m)))
+                groups += [re.sub(r"\b\w+\.", "", group) for group in groups]
+                return groups, m - 1, m - 1
+            if self.word(j) in ("HAVING", "ORDER", "LIMIT", "QUALIFY", "OFFSET", "FETCH", "WINDOW"):
+                return None, j - 1, j - 1
+        return None, insert_at, insert_at
+
+    def find_join_predicate(self, ref: TableRef, names: set[str]) -> Optional[tuple[str, int, int]]:
+        """
+        Find an `a.x = b.y` conjunct in the WHERE clause of the ref's select that joins it to another table.
+        :return: The condition text and its token range.
+        """
+        depth = self.depths[ref.start]
+        where = next((k for k in range(ref.end + 1, len(self.sig))
+                      if self.depths[k] == depth and self.word(k) == "WHERE"), None)
+        if where is None:
+            return None
+        end = where + 1
+        while end < len(self.sig) and self.depths[end] >= depth and not (
+                self.depths[end] == depth and (self.word(end) in CLAUSE_ENDS or self.text(end) == ";")):
+            end += 1
+        clause = range(where + 1, end)
+        if any(self.depths[k] == depth and self.word(k) == "OR" for k in clause):
+            return None
+        for k in clause:
+            if self.depths[k] != depth or self.word(k - 1) not in ("WHERE", "AND") or k + 6 >= end:
+                continue
+            if [self.text(k + 1), self.text(k + 3), self.text(k + 5)] != [".", "=", "."]:
+                continue
+            if k + 7 < end and self.word(k + 7) != "AND":
+                continue
+            if (self.word(k) in names) != (self.word(k + 4) in names):
+                return self.source_text(k, k + 6), k, k + 6
+        return None
+
+    def remove_predicate(self, start: int, end: int):
+        """Remove a conjunct with its AND, or the whole WHERE clause if it was the only condition."""
+        if self.word(start - 1) == "WHERE" and self.word(end + 1) == "AND":
+            self.replace(start, end + 1, "")
+        else:
+            self.replace(start - 1, end, "")
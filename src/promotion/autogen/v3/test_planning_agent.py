@@ -0,0 +1,88 @@
+"""
+Tests of the plan cache of CachedPlanningAgent.
+
+Usage:
+    uv run python -m unittest discover -s src/promotion/autogen/v3
+"""
+import os
+import tempfile
+import unittest
+from typing import AsyncGenerator, Sequence
+
+from autogen_agentchat.agents import BaseChatAgent
+from autogen_agentchat.base import Response
+from autogen_agentchat.messages import BaseChatMessage, TextMessage
+from autogen_core import CancellationToken
+
+from plan_cache import PlanCache
+from planning_agent import CachedPlanningAgent
+
+
+class CountingAgent(BaseChatAgent):
+    """Stands in for the model-backed planner and counts its turns."""
+
+    def __init__(self):
+        super().__init__(name="PlanningAgent", description="Planner")
+        self.calls = 0
+
+    @property
+    def produced_message_types(self) -> Sequence[type[BaseChatMessage]]:
+        return (TextMessage,)
+
+    async def on_messages(self, messages, cancellation_token: CancellationToken) -> Response:
+        self.calls += 1
+        return Response(chat_message=TextMessage(content=f"Plan {self.calls}", source=self.name))
+
+    async def on_messages_stream(self, messages, cancellation_token: CancellationToken) -> AsyncGenerator:
+        yield await self.on_messages(messages, cancellation_token)
+
+    async def on_reset(self, cancellation_token: CancellationToken):
+        pass
+
+
+class PlanCacheTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, "plan_cache.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def planner(self) -> tuple[CachedPlanningAgent, CountingAgent]:
+        agent = CountingAgent()
+        return CachedPlanningAgent(agent, "system message", "deployment/model", PlanCache(self.db_path)), agent
+
+    @staticmethod
+    async def turn(planner: CachedPlanningAgent, *messages: BaseChatMessage) -> str:
+        response = await planner.on_messages(list(messages), CancellationToken())
+        return response.chat_message.content
+
+    async def test_second_identical_task_hits_the_cache(self):
+        planner, agent = self.planner()
+        self.assertEqual("Plan 1", await self.turn(planner, TextMessage(content="How many promotions?", source="user")))
+        # Buffered messages of the other agents arrive with the next task and do not change the key
+        self.assertEqual("Plan 1", await self.turn(
+            planner,
+            TextMessage(content="There were 42 promotions.", source="WriterAgent"),
+            TextMessage(content="how many  promotions", source="user"),
+        ))
+        self.assertEqual(1, agent.calls)
+        self.assertEqual(1, planner.get_stats()["hits"])
+
+    async def test_turns_without_a_new_task_go_to_the_model(self):
+        planner, agent = self.planner()
+        await self.turn(planner, TextMessage(content="How many promotions?", source="user"))
+        self.assertEqual("Plan 2", await self.turn(planner, TextMessage(content="Rows: 42", source="DatabaseAgent")))
+        self.assertEqual(2, agent.calls)
+
+    async def test_plans_survive_a_new_process(self):
+        first, _ = self.planner()
+        await self.turn(first, TextMessage(content="How many promotions?", source="user"))
+        second, agent = self.planner()
+        self.assertEqual("Plan 1", await self.turn(second, TextMessage(content="How many promotions?", source="user")))
+        self.assertEqual(0, agent.calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+"""
+Tests of the SQL normalization behind the QueryCache keys.
+
+Usage:
+    uv run python -m unittest discover -s src/promotion/autogen/v3
+"""
+import unittest
+
+from query_cache import QueryCache
+
+
+class NormalizeSqlTest(unittest.TestCase):
+
+    def test_formatting_differences_share_a_key(self):
+        self.assertEqual(
+            QueryCache.make_key("SELECT a\n  FROM t -- all rows\nWHERE b = 'X' /* filter */;"),
+            QueryCache.make_key("select a from t where b = 'X'"),
+        )
+
+    def test_comment_markers_inside_literals_are_kept(self):
+        self.assertNotEqual(
+            QueryCache.make_key("SELECT a FROM t WHERE note = '--x' AND a = 1"),
+            QueryCache.make_key("SELECT a FROM t WHERE note = '--x' AND a = 2"),
+        )
+        self.assertNotEqual(
+            QueryCache.make_key("SELECT a FROM t WHERE note = 'x /* y */ z'"),
+            QueryCache.make_key("SELECT a FROM t WHERE note = 'x  z'"),
+        )
+
+    def test_escaped_quotes_do_not_end_a_literal(self):
+        self.assertNotEqual(
+            QueryCache.make_key("SELECT 'It''s -- a', b FROM t"),
+            QueryCache.make_key("SELECT 'It''s -- a', c FROM t"),
+        )
+
+    def test_quoted_identifiers_keep_their_case(self):
+        self.assertNotEqual(QueryCache.make_key('SELECT "Col" FROM t'), QueryCache.make_key('SELECT "COL" FROM t'))
+        self.assertEqual(QueryCache.make_key('SELECT "Col" FROM T'), QueryCache.make_key('select "Col" from t'))
+
+    def test_string_literals_keep_their_case(self):
+        self.assertNotEqual(
+            QueryCache.make_key("SELECT a FROM t WHERE b = 'X'"),
+            QueryCache.make_key("SELECT a FROM t WHERE b = 'x'"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
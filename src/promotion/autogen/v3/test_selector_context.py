@@ -0,0 +1,48 @@
+"""
+Tests of the bounded selector history of SelectorContext.
+
+Usage:
+    uv run python -m unittest discover -s src/promotion/autogen/v3
+"""
+import unittest
+
+from autogen_core.models import UserMessage
+
+from selector_context import SelectorContext
+
+
+class TaskPinningTest(unittest.IsolatedAsyncioTestCase):
+
+    async def history(self, context: SelectorContext) -> list[str]:
+        return [message.content for message in await context.get_messages()]
+
+    async def test_first_task_is_pinned(self):
+        context = SelectorContext(buffer_size=2, max_tokens=1000)
+        await context.add_message(UserMessage(content="How many promotions?", source="user"))
+        for turn in range(4):
+            await context.add_message(UserMessage(content=f"Step {turn}", source="PlanningAgent"))
+        self.assertEqual(["How many promotions?", "Step 2", "Step 3"], await self.history(context))
+
+    async def test_new_question_of_a_reused_team_is_pinned(self):
+        context = SelectorContext(buffer_size=2, max_tokens=1000)
+        await context.add_message(UserMessage(content="How many promotions?", source="user"))
+        await context.add_message(UserMessage(content="There were 42 promotions. TERMINATE", source="WriterAgent"))
+        await context.add_message(UserMessage(content="Which one had the most quotes?", source="user"))
+        for turn in range(3):
+            await context.add_message(UserMessage(content=f"Step {turn}", source="DatabaseAgent"))
+        self.assertEqual(["Which one had the most quotes?", "Step 1", "Step 2"], await self.history(context))
+
+    async def test_recent_question_keeps_its_place_in_the_thread(self):
+        context = SelectorContext(buffer_size=2, max_tokens=1000)
+        await context.add_message(UserMessage(content="How many promotions?", source="user"))
+        await context.add_message(UserMessage(content="There were 42 promotions. TERMINATE", source="WriterAgent"))
+        await context.add_message(UserMessage(content="Which one had the most quotes?", source="user"))
+        await context.add_message(UserMessage(content="Step 0", source="PlanningAgent"))
+        self.assertEqual(
+            ["There were 42 promotions. TERMINATE", "Which one had the most quotes?", "Step 0"],
+            await self.history(context),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+"""
+Tests of the column scoping of SqlValidator.
+
+Usage:
+    uv run python -m unittest discover -s src/promotion/autogen/v3
+"""
+import unittest
+
+from sql_validator import SqlValidator
+
+QUOTE_CED = "edh_publish.edh_shared.QUOTE_CED"
+PROMOTION = "edh_publish.edh_shared.PROMOTION"
+
+
+class ColumnScopeTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.validator = SqlValidator(SqlValidator.find_schema_dir())
+
+    def assertStatus(self, status: str, sql: str):
+        result = self.validator.validate(sql)
+        self.assertEqual(status, result.status, result.reasons)
+        return result
+
+    def test_unqualified_column_of_both_joined_tables_is_ambiguous(self):
+        result = self.assertStatus("UNDECIDED", (
+            f"SELECT PROMOTION_ID, COUNT(*) AS QUOTES FROM {QUOTE_CED} q "
+            f"JOIN {PROMOTION} p ON q.PROMOTION_ID = p.PROMOTION_ID GROUP BY PROMOTION_ID"))
+        self.assertIn("Ambiguous column PROMOTION_ID", result.reasons)
+
+    def test_column_of_a_subquery_table_is_not_visible_outside(self):
+        result = self.assertStatus("UNDECIDED", (
+            f"SELECT PROMOTION_NAME FROM {QUOTE_CED} "
+            f"WHERE PROMOTION_ID IN (SELECT PROMOTION_ID FROM {PROMOTION})"))
+        self.assertIn("Unknown column PROMOTION_NAME", result.reasons)
+
+    def test_correlated_column_is_left_to_the_judge(self):
+        self.assertStatus("UNDECIDED", (
+            f"SELECT QUOTE_NUMBER FROM {QUOTE_CED} q "
+            f"WHERE EXISTS (SELECT 1 FROM {PROMOTION} p WHERE p.PROMOTION_ID = q.PROMOTION_ID)"))
+
+    def test_columns_resolved_in_their_own_block_are_approved(self):
+        self.assertStatus("APPROVED", (
+            f"SELECT QUOTE_NUMBER FROM {QUOTE_CED} WHERE PROMOTION_ID IN "
+            f"(SELECT PROMOTION_ID FROM {PROMOTION} WHERE PROMOTION_NAME ILIKE '%Holiday%')"))
+        self.assertStatus("APPROVED", (
+            f"SELECT p.PROMOTION_NAME, COUNT(*) AS QUOTES FROM {QUOTE_CED} q "
+            f"JOIN {PROMOTION} p ON q.PROMOTION_ID = p.PROMOTION_ID GROUP BY p.PROMOTION_NAME ORDER BY QUOTES DESC"))
+
+
+if __name__ == "__main__":
+    unittest.main()
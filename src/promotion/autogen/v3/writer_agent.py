@@ -2,20 +2,30 @@
 Writer Agent for promotion analysis. Transforms data into clear
 business insights and actionable recommendations.
 """
-import os
+from typing import Optional
 
 from autogen_agentchat.agents import AssistantAgent
 from dotenv import load_dotenv
 
 from llm_util import LlmUtil
+from model_tiers import ModelDeployment, ModelTiers
 from prompt import WRITER_AGENT_SYSTEM_MESSAGE
 
 load_dotenv()
 
-writer_agent = AssistantAgent(
-    name="WriterAgent",
-    model_client=LlmUtil.get_llm(os.environ.get("AZURE_OPENAI_API_MODEL_GPT_4_1")),
-    description="Writer Agent for promotion analysis. "
-                "Transforms data into clear business insights and actionable recommendations.",
-    system_message=WRITER_AGENT_SYSTEM_MESSAGE,
-)
+
+def create_writer_agent(model: Optional[ModelDeployment] = None) -> AssistantAgent:
+    """
+    Create the Writer Agent.
+    :param model: The model and deployment, by default those of the writer role in the configured tier.
+    :return:
+    """
+    model = model or ModelTiers.get_model("writer")
+    return AssistantAgent(
+        name="WriterAgent",
+        model_client=LlmUtil.get_llm(model.model, model.deployment),
+        description="Writer Agent for promotion analysis. "
+                    "Transforms data into clear business insights and actionable recommendations.",
+        system_message=WRITER_AGENT_SYSTEM_MESSAGE,
+    )
+
@@ -1,4 +1,5 @@
 import json
+import os
 import re
 from enum import Enum
 from typing import Optional, TypedDict
@@ -11,15 +12,20 @@ from sqlalchemy import text
 from bedrock_llm_util import BedrockLlmUtil
 from llm_util import LlmUtil
 from prompt import SQL_GENERATION_PROMPT
+from query_cache import QueryCache
+from router_chat import RouterChatModel
 from schema_loader import SchemaLoader
 from snowflake_util import SnowflakeUtil
+from sql_cache import SqlCache
 
 load_dotenv()
 
 
 class GraphState(TypedDict):
     question: str
+    use_cache: bool
     sql_query: Optional[str]
+    viz_spec: Optional[dict]
     result_df: Optional[pd.DataFrame]
     summary_info: Optional[str]
     analysis: Optional[str]
@@ -27,20 +33,29 @@ class GraphState(TypedDict):
 class LlmProvider(Enum):
     APS_ANTHROPIC = 1
     AZURE_OPENAI = 2
+    ROUTED = 3
 
 class Analyzer:
     """Analyzes promotions using LLM and Snowflake."""
 
     def __init__(self, llm_provider: LlmProvider, schema_dir: str):
         self.llm_provider = llm_provider
+        self.schema_dir = schema_dir
+        self.schema_hash = SqlCache.schema_hash(schema_dir)
         self.schema = SchemaLoader(schema_dir).load()
+        self.router = Analyzer.create_router() if llm_provider == LlmProvider.ROUTED else None
+        if SqlCache.is_enabled():
+            SqlCache.shared().invalidate_schema(self.schema_hash)
         self.analysis_graph = self._create_analysis_graph()
 
-    def answer_question(self, question: str) -> dict[str, object]:
-        """Answers a user question by running the analysis graph."""
+    def answer_question(self, question: str, use_cache: bool = True) -> dict[str, object]:
+        """Answers a user question by running the analysis graph.
+        Set use_cache to False to bypass the SQL generation and result caches."""
         initial_state: GraphState = {
             "question": question,
+            "use_cache": use_cache,
             "sql_query": None,
+            "viz_spec": None,
             "result_df": None,
             "summary_info": None,
             "analysis": None,
@@ -54,31 +69,77 @@ class Analyzer:
             return BedrockLlmUtil.get_llm()
         elif self.llm_provider == LlmProvider.AZURE_OPENAI:
             return LlmUtil.get_llm()
+        elif self.llm_provider == LlmProvider.ROUTED:
+            # SQL generation and analysis sit on the critical path, so they hedge when ROUTER_HEDGE is set
+            if os.getenv("ROUTER_HEDGE", "false").lower() in ("1", "true", "yes"):
+                return self.router.with_hedging()
+            return self.router
         else:
             raise ValueError("Unsupported LLM provider")
 
     @staticmethod
-    def clean_response(input) -> str:
-        # Case 1: Direct JSON string
-        if isinstance(input, str):
-            output_str = re.sub(r"```json\s*", "", input)
-            output_str = re.sub(r"```", "", output_str)
-            return output_str.strip()
-
-        # Case 2: List with 'text' containing Markdown JSON
-        if isinstance(input, list) and input and 'text' in input[0]:
-            text = input[0]['text']
-            json_match = re.search(r'```json\s*({.*?})\s*```', text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-                return json_str
-
-        raise ValueError("No valid JSON found in input.")
+    def create_router() -> RouterChatModel:
+        """Creates a router over the APS Anthropic and Azure OpenAI models, tuned with the ROUTER_* settings."""
+        return RouterChatModel(
+            providers={
+                LlmProvider.APS_ANTHROPIC.name: BedrockLlmUtil.get_llm(),
+                LlmProvider.AZURE_OPENAI.name: LlmUtil.get_llm(),
+            },
+            window=int(os.getenv("ROUTER_WINDOW", "100")),
+            max_error_rate=float(os.getenv("ROUTER_MAX_ERROR_RATE", "0.5")),
+            cooldown=float(os.getenv("ROUTER_COOLDOWN", "60")),
+            min_hedge_delay=float(os.getenv("ROUTER_MIN_HEDGE_DELAY", "1")),
+        )
+
+    @staticmethod
+    def model_name(llm) -> Optional[str]:
+        """Returns the endpoint or deployment that identifies the model behind an LLM instance."""
+        if isinstance(llm, RouterChatModel):
+            return ",".join(f"{name}={Analyzer.model_name(model)}" for name, model in llm.providers.items())
+        return getattr(llm, "model_endpoint", None) or getattr(llm, "deployment_name", None)
+
+    def _refresh_schema(self):
+        """Reloads the schema context and drops stale cached SQL when the schema files have changed."""
+        schema_hash = SqlCache.schema_hash(self.schema_dir)
+        if schema_hash != self.schema_hash:
+            self.schema = SchemaLoader(self.schema_dir).load()
+            self.schema_hash = schema_hash
+            SqlCache.shared().invalidate_schema(schema_hash)
+
+    @staticmethod
+    def response_text(content) -> str:
+        """Returns the text of a chat response, whose content is a string or a list of content blocks."""
+        if isinstance(content, str):
+            return content
+        return "".join(block if isinstance(block, str) else block.get("text", "")
+                       for block in content if isinstance(block, str) or block.get("type") == "text")
+
+    @staticmethod
+    def clean_response(input: str) -> str:
+        # JSON in a Markdown code block, possibly surrounded by prose
+        json_match = re.search(r'```json\s*({.*?})\s*```', input, re.DOTALL)
+        if json_match:
+            return json_match.group(1)
+
+        # Direct JSON string
+        output_str = re.sub(r"```json\s*", "", input)
+        output_str = re.sub(r"```", "", output_str)
+        return output_str.strip()
 
     def _generate_sql_node(self, state: GraphState) -> GraphState:
         question = state["question"]
+        use_cache = state.get("use_cache", True) and SqlCache.is_enabled()
+        if use_cache:
+            self._refresh_schema()
         schema_context = self.schema
         llm = self.get_llm()
+        cache_key = SqlCache.make_key(question, schema_context, self.llm_provider.name, Analyzer.model_name(llm))
+        spec_json = SqlCache.shared().get(cache_key) if use_cache else None
+        if spec_json is not None:
+            state["sql_query"] = spec_json.get("sql")
+            state["viz_spec"] = {k: spec_json.get(k) for k in ("viz_type", "x", "y", "title")}
+            return state
+
         system_prompt = SQL_GENERATION_PROMPT.format(schema_context=schema_context)
         print(system_prompt)
         response = llm.invoke(
@@ -87,16 +148,22 @@ class Analyzer:
                 {"role": "user", "content": question},
             ]
         )
-        spec_str = response.content
+        spec_str = Analyzer.response_text(response.content)
 
         try:
             clean_str = Analyzer.clean_response(spec_str)
             spec_json = json.loads(clean_str)
             state["sql_query"] = spec_json.get("sql")
+            state["viz_spec"] = {k: spec_json.get(k) for k in ("viz_type", "x", "y", "title")}
         except Exception as e:
             print(f"Could not parse JSON from LLM response: {e}")
             print(f"Raw LLM output: {spec_str}")
             state["sql_query"] = None
+            state["viz_spec"] = None
+
+        if state["sql_query"] and SqlCache.is_enabled():
+            SqlCache.shared().put(cache_key, question, self.schema_hash,
+                                  dict(state["viz_spec"], sql=state["sql_query"]))
 
         return state
 
@@ -105,11 +172,29 @@ class Analyzer:
         sql = state.get("sql_query")
         if not sql:
             return state
-        engine = SnowflakeUtil.get_snowflake_engine()
+        use_cache = state.get("use_cache", True) and QueryCache.is_enabled()
+        cache_key = QueryCache.make_key(sql)
+        cached = QueryCache.shared().get(cache_key) if use_cache else None
+        if cached is not None:
+            table, df = cached
+            # summarize_dataframe converts date columns in place, so hand out a fresh frame
+            state["result_df"] = SnowflakeUtil.arrow_to_dataframe(table) if table is not None else df.copy()
+            return state
+
         try:
-            with engine.connect() as conn:
-                df = pd.read_sql(text(sql), conn)
+            if os.getenv("SNOWFLAKE_FETCH_MODE", "arrow") == "arrow":
+                # The Arrow table is cached and wrapped in a fresh DataFrame on every hit
+                table = SnowflakeUtil.query_arrow(sql)
+                df = SnowflakeUtil.arrow_to_dataframe(table)
+                cached, size = (table, None), table.nbytes
+            else:
+                table = None
+                with SnowflakeUtil.connect() as conn:
+                    df = pd.read_sql(text(sql), conn)
+                cached, size = (None, df.copy()), int(df.memory_usage(deep=True).sum())
             state["result_df"] = df
+            if QueryCache.is_enabled():
+                QueryCache.shared().put(cache_key, cached, size)
         except Exception as e:
             print(f"Error executing SQL: {e}")
             state["result_df"] = None
@@ -152,15 +237,14 @@ class Analyzer:
 
         return state
 
-    @staticmethod
-    def analysis_node(state: GraphState) -> GraphState:
+    def analysis_node(self, state: GraphState) -> GraphState:
         df = state.get("result_df")
         question = state.get("question")
         summary_info = state.get("summary_info") or ""
         if df is None or df.empty:
             state["analysis"] = "No data was returned for the given query."
             return state
-        llm = LlmUtil.get_llm()
+        llm = self.get_llm()
         analysis_prompt = (
             f"The user asked: \"{question}\"\n\n"
             f"Here is a summary of the data:\n{summary_info}\n\n"
@@ -174,7 +258,7 @@ class Analyzer:
                 {"role": "user", "content": analysis_prompt},
             ]
         )
-        state["analysis"] = response.content
+        state["analysis"] = Analyzer.response_text(response.content)
 
         return state
 
@@ -183,7 +267,7 @@ class Analyzer:
         workflow.add_node("generate_sql", self._generate_sql_node)
         workflow.add_node("run_sql", Analyzer.run_sql_node)
         workflow.add_node("summarize",  Analyzer.summarize_node)
-        workflow.add_node("analyze", Analyzer.analysis_node)
+        workflow.add_node("analyze", self.analysis_node)
         workflow.add_edge(START, "generate_sql")
         workflow.add_edge("generate_sql", "run_sql")
         workflow.add_edge("run_sql", "summarize")
@@ -2,9 +2,12 @@
 Utility to get a Bedrock LLM instance.
 """
 import os
+import threading
+from typing import Optional
 
 import logging
 from dotenv import load_dotenv
+from langchain_core.rate_limiters import InMemoryRateLimiter
 
 from custom_langchain_bedrock import BedrockClient, CustomBedrockAnthropicChat
 
@@ -18,20 +21,56 @@ class BedrockLlmUtil:
     Utility class to get a Bedrock LLM instance.
     """
 
+    _client: Optional[BedrockClient] = None
+    _rate_limiter: Optional[InMemoryRateLimiter] = None
+    _lock = threading.Lock()
+
     @staticmethod
-    def get_llm():
-        bedrock_client = BedrockClient(
-            auth_url=os.environ.get("APS_HOST"),
-            client_id=os.environ.get("APS_CLIENT_ID"),
-            client_secret=os.environ.get("APS_CLIENT_SECRET"),
-        )
+    def get_client() -> BedrockClient:
+        """
+        Get the shared Bedrock client, so that its token and connections are reused across LLM instances.
+        """
+        with BedrockLlmUtil._lock:
+            if BedrockLlmUtil._client is None:
+                BedrockLlmUtil._client = BedrockClient(
+                    auth_url=os.environ.get("APS_HOST"),
+                    client_id=os.environ.get("APS_CLIENT_ID"),
+                    client_secret=os.environ.get("APS_CLIENT_SECRET"),
+                    pool_size=int(os.environ.get("APS_HTTP_POOL_SIZE", "10")),
+                    token_refresh_margin=float(os.environ.get("APS_TOKEN_REFRESH_MARGIN", "60")),
+                )
+            return BedrockLlmUtil._client
+
+    @staticmethod
+    def get_rate_limiter() -> Optional[InMemoryRateLimiter]:
+        """
+        Get the shared token bucket limiting the request rate to the APS endpoint, configured with
+        APS_REQUESTS_PER_SECOND and APS_RATE_LIMIT_BURST. Returns None when no rate is set.
+        """
+        requests_per_second = float(os.environ.get("APS_REQUESTS_PER_SECOND", "0"))
+        if requests_per_second <= 0:
+            return None
+        with BedrockLlmUtil._lock:
+            if BedrockLlmUtil._rate_limiter is None:
+                BedrockLlmUtil._rate_limiter = InMemoryRateLimiter(
+                    requests_per_second=requests_per_second,
+                    check_every_n_seconds=0.05,
+                    max_bucket_size=float(os.environ.get("APS_RATE_LIMIT_BURST", "1")),
+                )
+            return BedrockLlmUtil._rate_limiter
 
+    @staticmethod
+    def get_llm():
         return CustomBedrockAnthropicChat(
-            client=bedrock_client,
+            client=BedrockLlmUtil.get_client(),
             llm_type=os.environ.get("APS_LLM_TYPE"),
             model_endpoint=os.environ.get("APS_MODEL_ENDPOINT"),
+            stream_endpoint=os.environ.get("APS_MODEL_STREAM_ENDPOINT"),
             temperature=0.3,
-            anthropic_version=os.environ.get("APS_ANTHROPIC_VERSION"))
+            anthropic_version=os.environ.get("APS_ANTHROPIC_VERSION"),
+            max_concurrency=int(os.environ.get("APS_MAX_CONCURRENCY", "4")),
+            prompt_cache_min_chars=int(os.environ.get("APS_PROMPT_CACHE_MIN_CHARS", "4000")) or None,
+            rate_limiter=BedrockLlmUtil.get_rate_limiter())
 
 
 def main():
@@ -39,6 +78,10 @@ def main():
     response = llm.invoke("Tell me a joke")
     print(response.content)
 
+    responses = llm.batch_all([f"Tell me a joke about the number {i}" for i in range(5)])
+    for response in responses:
+        print(response if isinstance(response, Exception) else response.content)
+
 
 if __name__ == "__main__":
     main()
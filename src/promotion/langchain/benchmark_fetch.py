@@ -0,0 +1,88 @@
+"""
+Benchmark comparing the row-based pd.read_sql path with the Arrow fetch path of run_sql_node.
+
+Both modes of Analyzer.run_sql_node (SNOWFLAKE_FETCH_MODE=pandas and arrow) run the same
+QUOTE_CED query against the configured backend, with the result cache bypassed. The backend
+defaults to the local SQLite stand-in; set SNOWFLAKE_BACKEND=snowflake to measure a real
+warehouse, where the Arrow path reads the connector's result chunks with fetch_arrow_batches.
+SQLite has no native Arrow fetch, so there the arrow mode builds Arrow batches from fetchmany
+rows and measures that conversion only; the report names the path that ran. The local database
+is (re)built with LOCAL_SNOWFLAKE_ROWS rows, by default 1,000,000.
+
+Usage:
+    uv run src/promotion/langchain/benchmark_fetch.py [repeats]
+"""
+import os
+import sqlite3
+import statistics
+import sys
+import time
+
+os.environ.setdefault("SNOWFLAKE_BACKEND", "local")
+os.environ.setdefault("LOCAL_SNOWFLAKE_ROWS", "1000000")
+
+from analyzer import Analyzer
+from local_snowflake import LocalSnowflake
+from snowflake_util import SnowflakeUtil
+
+QUERY = ("SELECT QUOTE_NUMBER, QUOTE_DATE, QUOTE_STATUS, CURRENCY_CODE, PROMOTION_DISCOUNT_AMOUNT, "
+         "SUB_TOTAL_AMOUNT FROM QUOTE_CED")
+
+
+def prepare_local_database():
+    """Rebuilds the local database unless it already holds LOCAL_SNOWFLAKE_ROWS quote rows."""
+    local = LocalSnowflake.from_env()
+    rows = None
+    if os.path.exists(local.db_path):
+        with sqlite3.connect(local.db_path) as connection:
+            try:
+                rows = connection.execute("SELECT COUNT(*) FROM QUOTE_CED").fetchone()[0]
+            except sqlite3.Error:
+                pass
+    if rows != local.rows:
+        print(f"Building {local.db_path} with {local.rows:,} QUOTE_CED rows")
+        local.build()
+
+
+def arrow_fetch_path() -> str:
+    """Returns the way fetch_arrow reads results on the configured backend."""
+    with SnowflakeUtil.connect() as conn:
+        cursor = conn.connection.cursor()
+        try:
+            return "fetch_arrow_batches" if hasattr(cursor, "fetch_arrow_batches") else "fetchmany"
+        finally:
+            cursor.close()
+
+
+def measure(mode: str, repeats: int, label: str):
+    os.environ["SNOWFLAKE_FETCH_MODE"] = mode
+    timings = []
+    df = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        df = Analyzer.run_sql_node({"sql_query": QUERY, "use_cache": False})["result_df"]
+        timings.append(time.perf_counter() - start)
+    if df is None:
+        print(f"{label:<28} failed, see the error above")
+        return
+    print(f"{label:<28} {min(timings):>8.2f}s best {statistics.median(timings):>8.2f}s median  "
+          f"{len(df):>10,} rows  frame {df.memory_usage(deep=True).sum() / 2 ** 20:>8.1f} MiB  "
+          f"dtypes {sorted({str(dtype) for dtype in df.dtypes})}")
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    if SnowflakeUtil.is_local():
+        prepare_local_database()
+    # Warm up the connection pool outside the timings
+    path = arrow_fetch_path()
+    print(f"Fetching QUOTE_CED from the {os.getenv('SNOWFLAKE_BACKEND')} backend, {repeats} runs per mode")
+    if path != "fetch_arrow_batches":
+        print("This backend has no native Arrow fetch: the arrow mode converts fetchmany rows to Arrow, "
+              "so it does not measure the Snowflake Arrow path")
+    for mode, label in (("pandas", "pandas (read_sql)"), ("arrow", f"arrow ({path})")):
+        measure(mode, repeats, label)
+
+
+if __name__ == "__main__":
+    main()
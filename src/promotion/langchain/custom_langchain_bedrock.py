@@ -1,17 +1,26 @@
 """
 Custom Bedrock Chat model for LangChain integration.
 """
+import asyncio
 import base64
+import json
 import os
-from typing import Optional, Any, List
+import threading
+import time
+from typing import Optional, Any, AsyncIterator, Iterator, List, Sequence, Union
 
+import httpx
 import logging
 import requests
 from dotenv import load_dotenv
-from langchain_core.callbacks import CallbackManagerForLLMRun
-from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
-from langchain_core.outputs import ChatGeneration, ChatResult
+from requests.adapters import HTTPAdapter
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableConfig
+
+from resilience import EndpointGuard, LlmHttpError, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
@@ -21,16 +30,31 @@ load_dotenv()
 class BedrockClient:
     """
     Client to interact with Bedrock API for authentication and message posting.
+    The bearer token is cached until shortly before it expires, and all requests go
+    through one keep-alive session. The async methods share the token cache and use one
+    httpx.AsyncClient pool per event loop, closed when that loop shuts down.
     """
 
-    def __init__(self, auth_url, client_id: str, client_secret: str):
+    def __init__(self, auth_url, client_id: str, client_secret: str, pool_size: int = 10,
+                 token_refresh_margin: float = 60):
         self.auth_url = auth_url
         self.client_id = client_id
         self.client_secret = client_secret
-
-    def get_token(self) -> str:
+        self.token_refresh_margin = token_refresh_margin
+        self._token: Optional[str] = None
+        self._token_expires_at = 0.0
+        self._token_lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.pool_size = pool_size
+        self._async_clients: dict[asyncio.AbstractEventLoop, tuple[httpx.AsyncClient, asyncio.Lock, Any]] = {}
+        self._async_clients_lock = threading.Lock()
+
+    def _token_request(self) -> tuple[dict, dict]:
         """
-        Obtain a bearer token using client credentials.
+        Build the headers and form payload of a client credentials token request.
         :return:
         """
         # Concatenate the client ID and secret with a colon
@@ -47,50 +71,297 @@ class BedrockClient:
 
         # Define the payload
         payload = {"grant_type": "client_credentials", "scope": "data:read"}
+        return headers, payload
+
+    @staticmethod
+    def _parse_token_response(status_code: int, token_data: Any, text: str, headers: Any) -> tuple[str, float]:
+        # Check if the request was successful
+        if status_code == 200:
+            return token_data["access_token"], float(token_data.get("expires_in", 300))
+
+        raise LlmHttpError(f"Failed to obtain token: {status_code} {text}", status_code,
+                           parse_retry_after(headers))
+
+    def _store_token(self, token: str, expires_in: float):
+        self._token = token
+        self._token_expires_at = time.monotonic() + max(expires_in - self.token_refresh_margin, 0)
+
+    def _cached_token(self) -> Optional[str]:
+        if self._token is not None and time.monotonic() < self._token_expires_at:
+            return self._token
+        return None
+
+    def _request_token(self) -> tuple[str, float]:
+        """
+        Request a new bearer token using client credentials.
+        :return: The token and its lifetime in seconds.
+        """
+        headers, payload = self._token_request()
 
         # Make the POST request to get the token
-        response = requests.post(self.auth_url, headers=headers, data=payload, timeout=10)
+        response = self.session.post(self.auth_url, headers=headers, data=payload, timeout=10)
+        token_data = response.json() if response.status_code == 200 else None
+        return self._parse_token_response(response.status_code, token_data, response.text, response.headers)
 
-        # Check if the request was successful
-        if response.status_code == 200:
-            token_data = response.json()
-            return token_data["access_token"]
+    async def _arequest_token(self) -> tuple[str, float]:
+        """
+        Request a new bearer token using client credentials without blocking the event loop.
+        :return: The token and its lifetime in seconds.
+        """
+        headers, payload = self._token_request()
+        response = await self._get_async_client().post(self.auth_url, headers=headers, data=payload, timeout=10)
+        token_data = response.json() if response.status_code == 200 else None
+        return self._parse_token_response(response.status_code, token_data, response.text, response.headers)
 
-        raise Exception(f"Failed to obtain token: {response.status_code} {response.text}")
+    def get_token(self) -> str:
+        """
+        Obtain a bearer token, reusing the cached one until shortly before it expires.
+        Concurrent callers share a single refresh.
+        :return:
+        """
+        token = self._cached_token()
+        if token is not None:
+            return token
+
+        with self._token_lock:
+            token = self._cached_token()
+            if token is None:
+                token, expires_in = self._request_token()
+                self._store_token(token, expires_in)
+            return token
+
+    async def aget_token(self) -> str:
+        """
+        Async variant of get_token. Concurrent coroutines share a single refresh.
+        :return:
+        """
+        token = self._cached_token()
+        if token is not None:
+            return token
+
+        async with self._async_state()[1]:
+            token = self._cached_token()
+            if token is None:
+                token, expires_in = await self._arequest_token()
+                self._store_token(token, expires_in)
+            return token
+
+    def _async_state(self) -> tuple[httpx.AsyncClient, asyncio.Lock, Any]:
+        """
+        Get the async HTTP client and token lock of the running event loop. httpx connections and
+        asyncio locks belong to one loop, so every loop gets its own client. The client is closed by
+        the loop's async generator shutdown, which asyncio.run performs before closing the loop.
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        with self._async_clients_lock:
+            # Loops closed without shutting down their async generators leave their entry behind
+            for stale in [other for other in self._async_clients if other.is_closed()]:
+                del self._async_clients[stale]
+            state = self._async_clients.get(loop)
+            if state is None:
+                client = httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+                    timeout=httpx.Timeout(60.0),
+                )
+                closer = self._close_on_shutdown(loop, client)
+                state = (client, asyncio.Lock(), closer)
+                self._async_clients[loop] = state
+                # Starting the generator registers it with the loop, so shutdown_asyncgens finalizes it
+                asyncio.ensure_future(closer.__anext__())
+        return state
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        return self._async_state()[0]
+
+    async def _close_on_shutdown(self, loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient):
+        try:
+            yield
+        finally:
+            with self._async_clients_lock:
+                if self._async_clients.get(loop, (None,))[0] is client:
+                    del self._async_clients[loop]
+            await client.aclose()
+
+    def invalidate_token(self):
+        """
+        Drop the cached token so that the next call fetches a new one.
+        """
+        with self._token_lock:
+            self._token = None
+            self._token_expires_at = 0.0
+
+    @staticmethod
+    def _response_error(status_code: int, text: str, headers: Any) -> LlmHttpError:
+        return LlmHttpError(f"Failed to obtain response: {status_code} {text}", status_code,
+                            parse_retry_after(headers))
 
     def post_message(self, endpoint: str, payload: dict) -> dict:
         """
-        Post a message to the specified Bedrock endpoint.
+        Post a message to the specified Bedrock endpoint. Throttled and transient failures are
+        retried with backoff, within the endpoint's adaptive concurrency limit.
         :param endpoint:
         :param payload:
         :return:
         """
-        token = self.get_token()
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {token}",
-        }
+        return EndpointGuard.for_endpoint(endpoint).call(self._post_message, endpoint, payload)
+
+    def _post_message(self, endpoint: str, payload: dict) -> dict:
+        for attempt in range(2):
+            token = self.get_token()
+            headers = {
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {token}",
+            }
+
+            response = self.session.post(endpoint, headers=headers, json=payload, timeout=60)
+            # Check if the request was successful
+            if response.status_code == 200:
+                return response.json()
+            # A token revoked before its expiry is fetched again once
+            if response.status_code == 401 and attempt == 0:
+                self.invalidate_token()
+                continue
+            break
 
-        # Make the POST request to get the token
-        response = requests.post(endpoint, headers=headers, json=payload, timeout=60)
-        # Check if the request was successful
-        if response.status_code == 200:
-            return response.json()
+        raise self._response_error(response.status_code, response.text, response.headers)
 
-        raise Exception(f"Failed to obtain response: {response.status_code} {response.text}")
+    async def apost_message(self, endpoint: str, payload: dict) -> dict:
+        """
+        Async variant of post_message.
+        :param endpoint:
+        :param payload:
+        :return:
+        """
+        return await EndpointGuard.for_endpoint(endpoint).acall(self._apost_message, endpoint, payload)
+
+    async def _apost_message(self, endpoint: str, payload: dict) -> dict:
+        client = self._get_async_client()
+        for attempt in range(2):
+            token = await self.aget_token()
+            headers = {
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {token}",
+            }
+
+            response = await client.post(endpoint, headers=headers, json=payload, timeout=60)
+            if response.status_code == 200:
+                return response.json()
+            if response.status_code == 401 and attempt == 0:
+                self.invalidate_token()
+                continue
+            break
+
+        raise self._response_error(response.status_code, response.text, response.headers)
+
+    @staticmethod
+    def _parse_event(line: str) -> Optional[dict]:
+        """
+        Parse one line of a server-sent event stream. Only the data lines carry a payload;
+        the event name is repeated in its "type" field.
+        :param line:
+        :return:
+        """
+        if not line.startswith("data:"):
+            return None
+        data = line[len("data:"):].strip()
+        if not data:
+            return None
+        return json.loads(data)
+
+    def stream_message(self, endpoint: str, payload: dict) -> Iterator[dict]:
+        """
+        Post a message with streaming enabled and yield the Anthropic stream events as they arrive.
+        Failures before the first event are retried like post_message, within the same concurrency limit.
+        :param endpoint:
+        :param payload:
+        :return:
+        """
+        return EndpointGuard.for_endpoint(endpoint).stream(self._stream_message, endpoint, payload)
+
+    def _stream_message(self, endpoint: str, payload: dict) -> Iterator[dict]:
+        payload = dict(payload, stream=True)
+        for attempt in range(2):
+            token = self.get_token()
+            headers = {
+                "Content-Type": "application/json",
+                "Accept": "text/event-stream",
+                "Authorization": f"Bearer {token}",
+            }
+
+            with self.session.post(endpoint, headers=headers, json=payload, timeout=60, stream=True) as response:
+                if response.status_code == 200:
+                    for line in response.iter_lines(decode_unicode=True):
+                        event = self._parse_event(line) if line else None
+                        if event is not None:
+                            yield event
+                    return
+                if response.status_code == 401 and attempt == 0:
+                    self.invalidate_token()
+                    continue
+                raise self._response_error(response.status_code, response.text, response.headers)
+
+    def astream_message(self, endpoint: str, payload: dict) -> AsyncIterator[dict]:
+        """
+        Async variant of stream_message.
+        :param endpoint:
+        :param payload:
+        :return:
+        """
+        return EndpointGuard.for_endpoint(endpoint).astream(self._astream_message, endpoint, payload)
+
+    async def _astream_message(self, endpoint: str, payload: dict) -> AsyncIterator[dict]:
+        client = self._get_async_client()
+        payload = dict(payload, stream=True)
+        for attempt in range(2):
+            token = await self.aget_token()
+            headers = {
+                "Content-Type": "application/json",
+                "Accept": "text/event-stream",
+                "Authorization": f"Bearer {token}",
+            }
+
+            async with client.stream("POST", endpoint, headers=headers, json=payload, timeout=60) as response:
+                if response.status_code == 200:
+                    async for line in response.aiter_lines():
+                        event = self._parse_event(line) if line else None
+                        if event is not None:
+                            yield event
+                    return
+                await response.aread()
+                if response.status_code == 401 and attempt == 0:
+                    self.invalidate_token()
+                    continue
+                raise self._response_error(response.status_code, response.text, response.headers)
+
+    async def aclose(self):
+        """
+        Close the async HTTP client of the running event loop.
+        """
+        with self._async_clients_lock:
+            state = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state[0].aclose()
 
 
 class CustomBedrockAnthropicChat(BaseChatModel):
     """
     Custom Bedrock Chat model for LangChain integration.
+    Batches run at most max_concurrency requests at a time unless the config says otherwise;
+    set rate_limiter to an InMemoryRateLimiter to also cap the request rate.
+    System prompts of at least prompt_cache_min_chars characters are marked for Anthropic prompt
+    caching, and so is any message with a cache_control entry in its additional_kwargs.
     """
 
     client: BedrockClient
     model_endpoint: str
+    stream_endpoint: Optional[str] = None
     anthropic_version: str = "bedrock-2023-05-31"
     max_tokens: int = 1000
     temperature: float = 0.7
     llm_type: str
+    max_concurrency: Optional[int] = None
+    prompt_cache_min_chars: Optional[int] = 4000
 
     @property
     def _llm_type(self) -> str:
@@ -98,20 +369,63 @@ class CustomBedrockAnthropicChat(BaseChatModel):
         Used for logging purposes only."""
         return self.llm_type
 
-    def _generate(
+    def _with_max_concurrency(
             self,
-            messages: list[BaseMessage],
-            stop: Optional[list[str]] = None,
-            run_manager: Optional[CallbackManagerForLLMRun] = None,
+            config: Optional[Union[RunnableConfig, list[RunnableConfig]]],
+    ) -> Optional[Union[RunnableConfig, list[RunnableConfig]]]:
+        """Apply the default max_concurrency to configs that do not set their own."""
+        if self.max_concurrency is None:
+            return config
+        if isinstance(config, list):
+            return [self._with_max_concurrency(c) for c in config]
+        config = dict(config or {})
+        if config.get("max_concurrency") is None:
+            config["max_concurrency"] = self.max_concurrency
+        return config
+
+    def batch(
+            self,
+            inputs: list[LanguageModelInput],
+            config: Optional[Union[RunnableConfig, list[RunnableConfig]]] = None,
+            *,
+            return_exceptions: bool = False,
             **kwargs: Any,
-    ) -> ChatResult:
-        """Generate a response from the model."""
-        system_prompt: str = ""
+    ) -> list[BaseMessage]:
+        """Run the inputs concurrently, bounded by max_concurrency."""
+        return super().batch(inputs, self._with_max_concurrency(config),
+                             return_exceptions=return_exceptions, **kwargs)
+
+    async def abatch(
+            self,
+            inputs: list[LanguageModelInput],
+            config: Optional[Union[RunnableConfig, list[RunnableConfig]]] = None,
+            *,
+            return_exceptions: bool = False,
+            **kwargs: Any,
+    ) -> list[BaseMessage]:
+        """Run the inputs concurrently on the event loop, bounded by max_concurrency."""
+        return await super().abatch(inputs, self._with_max_concurrency(config),
+                                    return_exceptions=return_exceptions, **kwargs)
+
+    def batch_all(self, inputs: Sequence[LanguageModelInput], **kwargs: Any) -> list[Union[BaseMessage, Exception]]:
+        """
+        Run a batch in which a failed element does not abort the rest.
+        Results are in input order; failed elements are returned as their exception.
+        """
+        return self.batch(list(inputs), return_exceptions=True, **kwargs)
+
+    async def abatch_all(self, inputs: Sequence[LanguageModelInput],
+                         **kwargs: Any) -> list[Union[BaseMessage, Exception]]:
+        """Async variant of batch_all."""
+        return await self.abatch(list(inputs), return_exceptions=True, **kwargs)
+
+    def _build_payload(self, messages: list[BaseMessage], **kwargs: Any) -> dict[str, Any]:
+        """Build the Anthropic messages payload shared by the sync and async paths."""
+        system_blocks: List[dict[str, Any]] = []
         input_messages: List[dict[str, Any]] = []
         for message in messages:
             if isinstance(message, SystemMessage):
-                if isinstance(message.content, str):
-                    system_prompt = message.content
+                system_blocks = CustomBedrockAnthropicChat._content_blocks(message)
                 continue
             msg = CustomBedrockAnthropicChat._convert_message(message)
             input_messages.append(msg)
@@ -123,16 +437,145 @@ class CustomBedrockAnthropicChat(BaseChatModel):
             "messages": input_messages,
         }
 
-        if system_prompt is not None and system_prompt != "":
-            payload["system"] = system_prompt
+        system = self._build_system(system_blocks)
+        if system:
+            payload["system"] = system
         payload.update(kwargs)
+        return payload
+
+    def _build_system(self, blocks: List[dict[str, Any]]) -> Union[str, List[dict[str, Any]]]:
+        """Mark a long system prompt for caching; otherwise send it as a plain string."""
+        text_length = sum(len(block.get("text", "")) for block in blocks)
+        if (blocks and self.prompt_cache_min_chars is not None and text_length >= self.prompt_cache_min_chars
+                and not any("cache_control" in block for block in blocks)):
+            blocks[-1] = dict(blocks[-1], cache_control={"type": "ephemeral"})
+        if any("cache_control" in block for block in blocks):
+            return blocks
+        return "".join(block.get("text", "") for block in blocks)
 
-        response = self.client.post_message(self.model_endpoint, payload)
+    @staticmethod
+    def _content_blocks(message: BaseMessage) -> List[dict[str, Any]]:
+        """
+        Convert message content to Anthropic content blocks. Blocks given as dictionaries are kept
+        as they are, so they can carry their own cache_control.
+        """
+        content = message.content
+        if isinstance(content, str):
+            blocks = [{"type": "text", "text": content}] if content else []
+        else:
+            blocks = [{"type": "text", "text": block} if isinstance(block, str) else dict(block)
+                      for block in content]
+        cache_control = message.additional_kwargs.get("cache_control")
+        if cache_control and blocks:
+            blocks[-1] = dict(blocks[-1], cache_control=cache_control)
+        return blocks
+
+    @staticmethod
+    def _to_chat_result(response: dict[str, Any]) -> ChatResult:
         logger.debug("Original response: %r", response)
         output = CustomBedrockAnthropicChat._covert_to_ai_message(response)
         generation = ChatGeneration(message=output)
         return ChatResult(generations=[generation])
 
+    def _generate(
+            self,
+            messages: list[BaseMessage],
+            stop: Optional[list[str]] = None,
+            run_manager: Optional[CallbackManagerForLLMRun] = None,
+            **kwargs: Any,
+    ) -> ChatResult:
+        """Generate a response from the model."""
+        payload = self._build_payload(messages, **kwargs)
+        response = self.client.post_message(self.model_endpoint, payload)
+        return CustomBedrockAnthropicChat._to_chat_result(response)
+
+    async def _agenerate(
+            self,
+            messages: list[BaseMessage],
+            stop: Optional[list[str]] = None,
+            run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+            **kwargs: Any,
+    ) -> ChatResult:
+        """Generate a response from the model on the event loop, without a worker thread."""
+        payload = self._build_payload(messages, **kwargs)
+        response = await self.client.apost_message(self.model_endpoint, payload)
+        return CustomBedrockAnthropicChat._to_chat_result(response)
+
+    def _stream(
+            self,
+            messages: list[BaseMessage],
+            stop: Optional[list[str]] = None,
+            run_manager: Optional[CallbackManagerForLLMRun] = None,
+            **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        """Stream the response as it is generated. Usage metadata arrives on the final chunk."""
+        payload = self._build_payload(messages, **kwargs)
+        state: dict[str, Any] = {}
+        for event in self.client.stream_message(self.stream_endpoint or self.model_endpoint, payload):
+            chunk = CustomBedrockAnthropicChat._convert_stream_event(event, state)
+            if chunk is None:
+                continue
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.content, chunk=generation)
+            yield generation
+
+    async def _astream(
+            self,
+            messages: list[BaseMessage],
+            stop: Optional[list[str]] = None,
+            run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+            **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """Stream the response on the event loop. Usage metadata arrives on the final chunk."""
+        payload = self._build_payload(messages, **kwargs)
+        state: dict[str, Any] = {}
+        async for event in self.client.astream_message(self.stream_endpoint or self.model_endpoint, payload):
+            chunk = CustomBedrockAnthropicChat._convert_stream_event(event, state)
+            if chunk is None:
+                continue
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.content, chunk=generation)
+            yield generation
+
+    @staticmethod
+    def _convert_stream_event(event: dict[str, Any], state: dict[str, Any]) -> Optional[AIMessageChunk]:
+        """
+        Convert an Anthropic stream event to a message chunk. Message level details are collected
+        in state and emitted with the final chunk; events without text produce no chunk.
+        """
+        event_type = event.get("type")
+        if event_type == "message_start":
+            message = event.get("message", {})
+            state["id"] = message.get("id")
+            state["model"] = message.get("model")
+            state["usage"] = dict(message.get("usage", {}))
+        elif event_type == "content_block_delta":
+            delta = event.get("delta", {})
+            if delta.get("type") == "text_delta":
+                return AIMessageChunk(content=delta.get("text", ""), id=state.get("id"))
+        elif event_type == "message_delta":
+            state["stop_reason"] = event.get("delta", {}).get("stop_reason")
+            state["stop_sequence"] = event.get("delta", {}).get("stop_sequence")
+            # message_delta carries the cumulative usage so far
+            state.setdefault("usage", {}).update(event.get("usage", {}))
+        elif event_type == "message_stop":
+            return AIMessageChunk(
+                content="",
+                id=state.get("id"),
+                response_metadata={
+                    "model_name": state.get("model"),
+                    "stop_reason": state.get("stop_reason"),
+                    "stop_sequence": state.get("stop_sequence"),
+                },
+                usage_metadata=CustomBedrockAnthropicChat._usage_metadata(state.get("usage", {})),
+            )
+        elif event_type == "error":
+            error = event.get("error", {})
+            raise Exception(f"Streaming response failed: {error.get('type')} {error.get('message')}")
+        return None
+
     @staticmethod
     def _convert_message(message: BaseMessage) -> dict[str, Any]:
         if isinstance(message, HumanMessage):
@@ -147,14 +590,31 @@ class CustomBedrockAnthropicChat(BaseChatModel):
     def _convert_human_message(message: HumanMessage) -> dict[str, Any]:
         return {
             "role": "user",
-            "content": [{"type": "text", "text": message.content}]
+            "content": CustomBedrockAnthropicChat._content_blocks(message)
         }
 
     @staticmethod
     def _convert_ai_message(message: AIMessage) -> dict[str, Any]:
         return {
             "role": "assistant",
-            "content": [{"type": "text", "text": message.content}]
+            "content": CustomBedrockAnthropicChat._content_blocks(message)
+        }
+
+    @staticmethod
+    def _usage_metadata(usage: dict[str, Any]) -> dict[str, Any]:
+        """
+        Convert Anthropic usage to LangChain usage metadata. Anthropic counts cached prompt tokens
+        separately, so they are added to input_tokens and reported in input_token_details.
+        """
+        cache_read = usage.get("cache_read_input_tokens") or 0
+        cache_creation = usage.get("cache_creation_input_tokens") or 0
+        input_tokens = (usage.get("input_tokens") or 0) + cache_read + cache_creation
+        output_tokens = usage.get("output_tokens") or 0
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            "input_token_details": {"cache_read": cache_read, "cache_creation": cache_creation},
         }
 
     @staticmethod
@@ -168,12 +628,7 @@ class CustomBedrockAnthropicChat(BaseChatModel):
             content=text_contents,
             id=response.get("id"),
             response_metadata={"model_name": response["model"]},
-            usage_metadata={
-                "input_tokens": response["usage"]["input_tokens"],
-                "output_tokens": response["usage"]["output_tokens"],
-                "total_tokens": response["usage"]["input_tokens"] +
-                                response["usage"]["output_tokens"],
-            },
+            usage_metadata=CustomBedrockAnthropicChat._usage_metadata(response["usage"]),
             stop_reason=response.get("stop_reason"),
             stop_sequence=response.get("stop_sequence"),
         )
@@ -219,6 +674,10 @@ def main():
     print("++++++++++++++++++++++++++++++++")
     print(response.content)
 
+    for chunk in llm.stream("Write a short poem about the sea"):
+        print(chunk.content, end="", flush=True)
+    print()
+
 
 if __name__ == "__main__":
     main()
@@ -1,31 +1,114 @@
+import logging
 import os
+import threading
+import time
+from typing import Any, Callable, Optional
 
+from azure.core.credentials import AccessToken
 from azure.identity import DefaultAzureCredential
 from dotenv import load_dotenv
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatResult
 from langchain_openai import AzureChatOpenAI
 
+from resilience import EndpointGuard
+
+logger = logging.getLogger(__name__)
+
 load_dotenv()
 
 
+class AzureTokenCache:
+    """Thread-safe AAD token cache that refreshes the token in the background before it expires."""
+
+    def __init__(self, scope: str, refresh_margin: float = 300, retry_interval: float = 30):
+        self.scope = scope
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self._credential = DefaultAzureCredential()
+        self._token: Optional[AccessToken] = None
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def get_token(self) -> str:
+        """Returns a valid token, fetching it only when none is cached or it is about to expire."""
+        token = self._token
+        if token is None or token.expires_on - time.time() < 60:
+            with self._lock:
+                token = self._token
+                if token is None or token.expires_on - time.time() < 60:
+                    token = self._refresh()
+        return token.token
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self._credential.close()
+
+    def _refresh(self) -> AccessToken:
+        token = self._credential.get_token(self.scope)
+        self._token = token
+        self._schedule(max(token.expires_on - time.time() - self.refresh_margin, 1))
+        return token
+
+    def _schedule(self, delay: float):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._refresh_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _refresh_in_background(self):
+        with self._lock:
+            try:
+                self._refresh()
+            except Exception as e:
+                # The cached token stays in use until it expires; try again shortly
+                logger.warning("Background AAD token refresh failed: %s", e)
+                self._schedule(self.retry_interval)
+
+
+class ResilientAzureChatOpenAI(AzureChatOpenAI):
+    """AzureChatOpenAI that retries and limits concurrency through the shared endpoint guard."""
+
+    def _guard(self) -> EndpointGuard:
+        return EndpointGuard.for_endpoint(f"{self.azure_endpoint}/{self.deployment_name}")
+
+    def _generate(self, *args: Any, **kwargs: Any) -> ChatResult:
+        return self._guard().call(super()._generate, *args, **kwargs)
+
+    async def _agenerate(self, *args: Any, **kwargs: Any) -> ChatResult:
+        return await self._guard().acall(super()._agenerate, *args, **kwargs)
+
+
 class LlmUtil:
 
-    @staticmethod
-    def get_azure_credential():
-        credential = DefaultAzureCredential()
+    _token_cache: Optional[AzureTokenCache] = None
+    _lock = threading.Lock()
 
-        # Set the API_KEY to the token from the Azure credential
-        os.environ["OPENAI_API_KEY"] \
-            = credential.get_token("https://cognitiveservices.azure.com/.default").token
+    @staticmethod
+    def get_azure_credential() -> Callable[[], str]:
+        """Returns the token provider callback backed by the shared AAD token cache."""
+        with LlmUtil._lock:
+            if LlmUtil._token_cache is None:
+                LlmUtil._token_cache = AzureTokenCache(
+                    "https://cognitiveservices.azure.com/.default",
+                    refresh_margin=float(os.environ.get("AZURE_TOKEN_REFRESH_MARGIN", "300")),
+                )
+            return LlmUtil._token_cache.get_token
 
     @staticmethod
     def get_llm() -> AzureChatOpenAI:
-        LlmUtil.get_azure_credential()
-        return AzureChatOpenAI(
+        # Retries are handled by the endpoint guard, so the OpenAI client must not retry on its own
+        return ResilientAzureChatOpenAI(
             azure_endpoint=os.environ.get("AZURE_OPENAI_API_INSTANCE_NAME"),
             azure_deployment=os.environ.get("AZURE_OPENAI_API_DEPLOYMENT_NAME"),
             openai_api_version=os.environ.get("AZURE_OPENAI_API_VERSION"),
-            temperature=0
+            azure_ad_token_provider=LlmUtil.get_azure_credential(),
+            temperature=0,
+            max_retries=0,
         )
 
 
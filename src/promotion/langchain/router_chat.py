@@ -0,0 +1,231 @@
+"""
+Chat model that routes each call to the fastest healthy provider, with optional hedged requests.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderStats:
+    """Rolling latency and error statistics of one provider."""
+
+    def __init__(self, window: int):
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._unhealthy_until = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, succeeded: bool):
+        with self._lock:
+            self._outcomes.append(succeeded)
+            if succeeded:
+                self._latencies.append(latency)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return None
+        return latencies[min(int(q * len(latencies)), len(latencies) - 1)]
+
+    def error_rate(self) -> float:
+        with self._lock:
+            outcomes = list(self._outcomes)
+        return outcomes.count(False) / len(outcomes) if outcomes else 0.0
+
+    def samples(self) -> int:
+        with self._lock:
+            return len(self._outcomes)
+
+    def is_healthy(self, max_error_rate: float, min_samples: int, cooldown: float) -> bool:
+        """A provider whose error rate exceeds the limit is skipped for cooldown seconds, then gets a fresh window."""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._unhealthy_until:
+                return False
+            outcomes = list(self._outcomes)
+            if len(outcomes) >= min_samples and outcomes.count(False) / len(outcomes) > max_error_rate:
+                self._unhealthy_until = now + cooldown
+                self._outcomes.clear()
+                return False
+        return True
+
+    def snapshot(self) -> dict:
+        return {
+            "samples": self.samples(),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "error_rate": self.error_rate(),
+        }
+
+
+class RouterChatModel(BaseChatModel):
+    """
+    Chat model that sends each call to the healthy provider with the lowest rolling p50 latency,
+    and falls back to the next provider when a call fails. Providers with fewer than min_samples
+    calls are tried first so that every provider gets measured.
+    With hedge enabled, a second request goes to the next provider when the first has not answered
+    within its p95 latency; the first answer wins and the other request is cancelled.
+    """
+
+    providers: dict[str, BaseChatModel]
+    window: int = 100
+    min_samples: int = 5
+    max_error_rate: float = 0.5
+    cooldown: float = 60.0
+    hedge: bool = False
+    hedge_quantile: float = 0.95
+    min_hedge_delay: float = 1.0
+
+    _stats: dict[str, ProviderStats] = PrivateAttr(default_factory=dict)
+    _executor: Optional[ThreadPoolExecutor] = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any):
+        self._stats = {name: ProviderStats(self.window) for name in self.providers}
+        self._executor = ThreadPoolExecutor(max_workers=2 * len(self.providers), thread_name_prefix="router")
+
+    @property
+    def _llm_type(self) -> str:
+        return "router"
+
+    def with_hedging(self) -> "RouterChatModel":
+        """Returns a hedging copy that shares this router's statistics."""
+        return self.model_copy(update={"hedge": True})
+
+    def get_stats(self) -> dict[str, dict]:
+        return {name: stats.snapshot() for name, stats in self._stats.items()}
+
+    def _ranked_providers(self) -> list[str]:
+        def rank(name: str) -> tuple:
+            stats = self._stats[name]
+            healthy = stats.is_healthy(self.max_error_rate, self.min_samples, self.cooldown)
+            measured = stats.samples() >= self.min_samples
+            return not healthy, measured, stats.quantile(0.5) or 0.0
+
+        return sorted(self.providers, key=rank)
+
+    def _hedge_delay(self, name: str) -> float:
+        return max(self._stats[name].quantile(self.hedge_quantile) or 0.0, self.min_hedge_delay)
+
+    def _call(self, name: str, messages: list[BaseMessage], stop: Optional[list[str]],
+              run_manager: Optional[CallbackManagerForLLMRun], **kwargs: Any) -> BaseMessage:
+        # The provider runs as a child of this run, so tracing and token callbacks see its call
+        config = {"callbacks": run_manager.get_child()} if run_manager else None
+        start = time.perf_counter()
+        try:
+            result = self.providers[name].invoke(messages, config, stop=stop, **kwargs)
+        except Exception:
+            self._stats[name].record(time.perf_counter() - start, False)
+            raise
+        self._stats[name].record(time.perf_counter() - start, True)
+        return result
+
+    async def _acall(self, name: str, messages: list[BaseMessage], stop: Optional[list[str]],
+                     run_manager: Optional[AsyncCallbackManagerForLLMRun], **kwargs: Any) -> BaseMessage:
+        config = {"callbacks": run_manager.get_child()} if run_manager else None
+        start = time.perf_counter()
+        try:
+            result = await self.providers[name].ainvoke(messages, config, stop=stop, **kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._stats[name].record(time.perf_counter() - start, False)
+            raise
+        self._stats[name].record(time.perf_counter() - start, True)
+        return result
+
+    @staticmethod
+    def _to_chat_result(name: str, message: BaseMessage) -> ChatResult:
+        message.response_metadata["provider"] = name
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+            self,
+            messages: list[BaseMessage],
+            stop: Optional[list[str]] = None,
+            run_manager: Optional[CallbackManagerForLLMRun] = None,
+            **kwargs: Any,
+    ) -> ChatResult:
+        """Calls the ranked providers in turn; with hedging, a slow first call races the second one in a thread."""
+        names = self._ranked_providers()
+        error: Optional[Exception] = None
+        while names:
+            name = names.pop(0)
+            if not (self.hedge and names):
+                try:
+                    return self._to_chat_result(name, self._call(name, messages, stop, run_manager, **kwargs))
+                except Exception as e:
+                    logger.warning("Provider %s failed: %s", name, e)
+                    error = e
+                    continue
+
+            futures = {self._executor.submit(self._call, name, messages, stop, run_manager, **kwargs): name}
+            done, _ = wait(futures, timeout=self._hedge_delay(name))
+            if not done:
+                backup = names.pop(0)
+                logger.info("Hedging slow provider %s with %s", name, backup)
+                futures[self._executor.submit(self._call, backup, messages, stop, run_manager, **kwargs)] = backup
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        # A running thread cannot be interrupted; the losing call finishes in the background
+                        for other in pending:
+                            other.cancel()
+                        return self._to_chat_result(futures[future], future.result())
+                    logger.warning("Provider %s failed: %s", futures[future], future.exception())
+                    error = future.exception()
+        raise error or ValueError("No providers configured")
+
+    async def _agenerate(
+            self,
+            messages: list[BaseMessage],
+            stop: Optional[list[str]] = None,
+            run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+            **kwargs: Any,
+    ) -> ChatResult:
+        """Calls the ranked providers in turn; with hedging, a slow first call races the second and the loser is cancelled."""
+        names = self._ranked_providers()
+        error: Optional[Exception] = None
+        while names:
+            name = names.pop(0)
+            if not (self.hedge and names):
+                try:
+                    return self._to_chat_result(name, await self._acall(name, messages, stop, run_manager, **kwargs))
+                except Exception as e:
+                    logger.warning("Provider %s failed: %s", name, e)
+                    error = e
+                    continue
+
+            tasks = {asyncio.create_task(self._acall(name, messages, stop, run_manager, **kwargs)): name}
+            done, _ = await asyncio.wait(tasks, timeout=self._hedge_delay(name))
+            if not done:
+                backup = names.pop(0)
+                logger.info("Hedging slow provider %s with %s", name, backup)
+                tasks[asyncio.create_task(self._acall(backup, messages, stop, run_manager, **kwargs))] = backup
+            pending = set(tasks)
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is None:
+                            return self._to_chat_result(tasks[task], task.result())
+                        logger.warning("Provider %s failed: %s", tasks[task], task.exception())
+                        error = task.exception()
+            finally:
+                for task in pending:
+                    task.cancel()
+        raise error or ValueError("No providers configured")
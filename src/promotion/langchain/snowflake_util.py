@@ -1,16 +1,44 @@
+import atexit
 import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
 
+import pandas as pd
+import pyarrow as pa
 from dotenv import load_dotenv
 from snowflake.sqlalchemy import URL
-from sqlalchemy import create_engine, Engine, text
+from sqlalchemy import create_engine, Connection, Engine, text
+from sqlalchemy.pool import QueuePool
+
+from local_snowflake import LocalSnowflake
 
 load_dotenv()
 
 
 class SnowflakeUtil:
 
+    _engine: Optional[Engine] = None
+    _local: Optional[LocalSnowflake] = None
+    _engine_lock = threading.Lock()
+    _stats_lock = threading.Lock()
+    _pool_stats = {
+        "checkouts": 0,
+        "checkout_time_total": 0.0,
+        "checkout_time_max": 0.0,
+    }
+
+    @staticmethod
+    def is_local() -> bool:
+        """Returns True when SNOWFLAKE_BACKEND points at the local SQLite stand-in."""
+        return os.getenv("SNOWFLAKE_BACKEND", "snowflake").lower() == "local"
+
     @staticmethod
-    def get_snowflake_engine() -> Engine:
+    def get_snowflake_engine(**engine_kwargs) -> Engine:
+        if SnowflakeUtil.is_local():
+            SnowflakeUtil._local = LocalSnowflake.from_env()
+            return SnowflakeUtil._local.get_engine(**engine_kwargs)
         return create_engine(
             URL(
                 account=os.getenv("SNOWFLAKE_ACCOUNT"),
@@ -20,19 +48,121 @@ class SnowflakeUtil:
                 schema=os.getenv("SNOWFLAKE_SCHEMA"),
                 warehouse=os.getenv("SNOWFLAKE_WAREHOUSE"),
                 role=os.getenv("SNOWFLAKE_ROLE"),
-            )
+            ),
+            **engine_kwargs,
         )
 
+    @staticmethod
+    def get_engine() -> Engine:
+        """Returns the process-wide pooled engine, creating it on first use."""
+        if SnowflakeUtil._engine is None:
+            with SnowflakeUtil._engine_lock:
+                if SnowflakeUtil._engine is None:
+                    SnowflakeUtil._engine = SnowflakeUtil.get_snowflake_engine(
+                        poolclass=QueuePool,
+                        pool_size=int(os.getenv("SNOWFLAKE_POOL_SIZE", "5")),
+                        max_overflow=int(os.getenv("SNOWFLAKE_POOL_MAX_OVERFLOW", "5")),
+                        pool_timeout=float(os.getenv("SNOWFLAKE_POOL_TIMEOUT", "30")),
+                        pool_recycle=int(os.getenv("SNOWFLAKE_POOL_RECYCLE", "3600")),
+                        pool_pre_ping=True,
+                    )
+        return SnowflakeUtil._engine
+
+    @staticmethod
+    def dispose_engine():
+        """Disposes the process-wide engine and closes all pooled connections."""
+        with SnowflakeUtil._engine_lock:
+            if SnowflakeUtil._engine is not None:
+                SnowflakeUtil._engine.dispose()
+                SnowflakeUtil._engine = None
+
+    @staticmethod
+    @contextmanager
+    def connect() -> Iterator[Connection]:
+        """Checks out a pooled connection and records the checkout latency."""
+        start = time.perf_counter()
+        with SnowflakeUtil.get_engine().connect() as connection:
+            elapsed = time.perf_counter() - start
+            with SnowflakeUtil._stats_lock:
+                stats = SnowflakeUtil._pool_stats
+                stats["checkouts"] += 1
+                stats["checkout_time_total"] += elapsed
+                stats["checkout_time_max"] = max(stats["checkout_time_max"], elapsed)
+            yield connection
+
+    @staticmethod
+    def get_pool_stats() -> dict:
+        """Returns the checkout counters and the current pool status."""
+        with SnowflakeUtil._stats_lock:
+            stats = dict(SnowflakeUtil._pool_stats)
+        checkouts = stats["checkouts"]
+        stats["checkout_time_avg"] = stats["checkout_time_total"] / checkouts if checkouts else 0.0
+        engine = SnowflakeUtil._engine
+        stats["pool_status"] = engine.pool.status() if engine is not None else "not created"
+        return stats
+
+    @staticmethod
+    def fetch_arrow(cursor) -> pa.Table:
+        """Fetches the result of an executed DBAPI cursor as an Arrow table."""
+        if hasattr(cursor, "fetch_arrow_batches"):
+            # Snowflake connector: result chunks arrive as Arrow and are kept that way
+            tables = list(cursor.fetch_arrow_batches())
+            if tables:
+                return pa.concat_tables(tables)
+            names = [column[0] for column in cursor.description or []]
+            return pa.table({name: pa.array([], type=pa.null()) for name in names})
+
+        # Other DBAPI drivers: build the columns batch by batch from the fetched rows
+        names = [column[0] for column in cursor.description]
+        batches = []
+        while rows := cursor.fetchmany(int(os.getenv("SNOWFLAKE_FETCH_SIZE", "10000"))):
+            batches.append([pa.array(c) for c in zip(*rows)])
+        if not batches:
+            return pa.table({name: pa.array([], type=pa.null()) for name in names})
+        # Types are inferred per batch: a column whose values are all NULL in one batch comes out
+        # as null, and a NUMERIC column may hold integers in one batch and fractions in the next.
+        # Every batch is cast to the promoted type of each column, so that they share one schema.
+        types = [pa.unify_schemas([pa.schema([("value", batch[index].type)]) for batch in batches],
+                                  promote_options="permissive").field(0).type
+                 for index in range(len(names))]
+        return pa.Table.from_batches([
+            pa.record_batch([array.cast(type_) for array, type_ in zip(batch, types)], names=names)
+            for batch in batches
+        ])
+
+    @staticmethod
+    def query_arrow(sql: str) -> pa.Table:
+        """Executes a query on a pooled connection and returns the result as an Arrow table."""
+        with SnowflakeUtil.connect() as conn:
+            if SnowflakeUtil.is_local():
+                # The raw DBAPI cursor bypasses the engine's before_cursor_execute translation
+                sql = SnowflakeUtil._local.translate(sql)
+            cursor = conn.connection.cursor()
+            try:
+                cursor.execute(sql)
+                return SnowflakeUtil.fetch_arrow(cursor)
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def arrow_to_dataframe(table: pa.Table) -> pd.DataFrame:
+        """Wraps an Arrow table in a DataFrame with Arrow-backed dtypes.
+        Decimal columns become float64, so that aggregates are numbers rather than Decimal objects."""
+        for index, field in enumerate(table.schema):
+            if pa.types.is_decimal(field.type):
+                table = table.set_column(index, field.name, table.column(index).cast(pa.float64()))
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+atexit.register(SnowflakeUtil.dispose_engine)
+
 
 def main():
-    engine = SnowflakeUtil.get_snowflake_engine()
-    try:
-        with engine.connect() as connection:
-            result = connection.execute(text("SELECT GETDATE()"))
-            for row in result:
-                print(row)
-    finally:
-        engine.dispose()
+    with SnowflakeUtil.connect() as connection:
+        result = connection.execute(text("SELECT GETDATE()"))
+        for row in result:
+            print(row)
+    print(SnowflakeUtil.get_pool_stats())
 
 
 if __name__ == "__main__":
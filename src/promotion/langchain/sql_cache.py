@@ -0,0 +1,131 @@
+"""
+Persistent cache of generated SQL and visualization specs by question.
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class SqlCache:
+    """
+    SQLite-backed cache mapping a question to the SQL and viz spec generated for it.
+    Keys combine the normalized question, the schema context and the provider and model, so a
+    different prompt input never hits an old entry. Entries expire after ttl_seconds and the least
+    recently used ones are evicted beyond max_entries.
+    """
+
+    _shared: Optional["SqlCache"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, db_path: str, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 1000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sql_cache ("
+                "key TEXT PRIMARY KEY, question TEXT, schema_hash TEXT, spec TEXT, "
+                "created_at REAL, last_used_at REAL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def shared() -> "SqlCache":
+        """Returns the process-wide cache configured with SQL_CACHE_DB, SQL_CACHE_TTL and SQL_CACHE_MAX_ENTRIES."""
+        if SqlCache._shared is None:
+            with SqlCache._shared_lock:
+                if SqlCache._shared is None:
+                    SqlCache._shared = SqlCache(
+                        db_path=os.getenv("SQL_CACHE_DB", "sql_cache.db"),
+                        ttl_seconds=float(os.getenv("SQL_CACHE_TTL", str(7 * 24 * 3600))),
+                        max_entries=int(os.getenv("SQL_CACHE_MAX_ENTRIES", "1000")),
+                    )
+        return SqlCache._shared
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """Checks whether SQL generation caching is enabled with SQL_CACHE_ENABLED."""
+        return os.getenv("SQL_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        """Lower-cases the question, collapses whitespace and drops trailing punctuation."""
+        return re.sub(r"\s+", " ", question).strip().lower().rstrip("?.!").strip()
+
+    @staticmethod
+    def schema_hash(schema_dir: str) -> str:
+        """Hashes the names and contents of the schema/*.json files."""
+        digest = hashlib.sha256()
+        for f in sorted(glob.glob(str(Path(schema_dir) / "*.json"))):
+            digest.update(Path(f).name.encode("utf-8"))
+            digest.update(Path(f).read_bytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(question: str, schema_context: str, provider: str, model: Optional[str]) -> str:
+        parts = [
+            SqlCache.normalize_question(question),
+            hashlib.sha256(schema_context.encode("utf-8")).hexdigest(),
+            provider,
+            model or "",
+        ]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        """Returns the cached spec with keys sql, viz_type, x, y and title, or None if it is missing or expired."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT spec, created_at FROM sql_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM sql_cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE sql_cache SET last_used_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, key: str, question: str, schema_hash: str, spec: dict):
+        """Stores a spec, then removes expired entries and evicts the least recently used beyond max_entries."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sql_cache (key, question, schema_hash, spec, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, question, schema_hash, json.dumps(spec), now, now),
+            )
+            conn.execute("DELETE FROM sql_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM sql_cache WHERE key IN "
+                "(SELECT key FROM sql_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def invalidate_schema(self, schema_hash: str) -> int:
+        """Removes the entries generated for any other version of the schema files."""
+        with self._lock, self._connect() as conn:
+            return conn.execute("DELETE FROM sql_cache WHERE schema_hash != ?", (schema_hash,)).rowcount
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM sql_cache")
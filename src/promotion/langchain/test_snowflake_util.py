@@ -0,0 +1,89 @@
+"""
+Tests of the fetch paths of SnowflakeUtil.
+
+Usage:
+    uv run python -m unittest discover -s src/promotion/langchain
+"""
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import pyarrow as pa
+
+from analyzer import Analyzer
+from snowflake_util import SnowflakeUtil
+
+
+class FetchArrowTest(unittest.TestCase):
+
+    def setUp(self):
+        self.connection = sqlite3.connect(":memory:")
+        self.connection.execute("CREATE TABLE QUOTE (QUOTE_NUMBER TEXT, PROMOTION_ID TEXT, AMOUNT NUMERIC)")
+        # Fetched two rows at a time: the first batch has no promotion, the last one an amount with a fraction
+        self.connection.executemany("INSERT INTO QUOTE VALUES (?, ?, ?)", [
+            ("Q1", None, 10), ("Q2", None, 20), ("Q3", "P1", 30), ("Q4", "P2", 40.5),
+        ])
+
+    def tearDown(self):
+        self.connection.close()
+
+    def fetch(self, sql: str) -> pa.Table:
+        cursor = self.connection.execute(sql)
+        with mock.patch.dict(os.environ, {"SNOWFLAKE_FETCH_SIZE": "2"}):
+            return SnowflakeUtil.fetch_arrow(cursor)
+
+    def test_null_only_batch_takes_the_type_of_later_batches(self):
+        table = self.fetch("SELECT QUOTE_NUMBER, PROMOTION_ID, AMOUNT FROM QUOTE ORDER BY QUOTE_NUMBER")
+        self.assertEqual(table.schema.field("PROMOTION_ID").type, pa.string())
+        self.assertEqual(table.column("PROMOTION_ID").to_pylist(), [None, None, "P1", "P2"])
+
+    def test_integer_batch_is_promoted_to_double(self):
+        table = self.fetch("SELECT AMOUNT FROM QUOTE ORDER BY QUOTE_NUMBER")
+        self.assertEqual(table.schema.field("AMOUNT").type, pa.float64())
+        self.assertEqual(table.column("AMOUNT").to_pylist(), [10, 20, 30, 40.5])
+
+    def test_column_without_values_stays_null(self):
+        table = self.fetch("SELECT PROMOTION_ID FROM QUOTE WHERE PROMOTION_ID IS NULL")
+        self.assertEqual(table.schema.field("PROMOTION_ID").type, pa.null())
+        self.assertEqual(table.num_rows, 2)
+
+
+class LocalFetchModeTest(unittest.TestCase):
+
+    QUERY = ("SELECT q.CURRENCY_CODE, COUNT(*) AS QUOTES FROM edh_publish.edh_shared.QUOTE_CED q "
+             "WHERE q.QUOTE_STATUS ILIKE 'order%' GROUP BY q.CURRENCY_CODE ORDER BY q.CURRENCY_CODE")
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.environ = mock.patch.dict(os.environ, {
+            "SNOWFLAKE_BACKEND": "local",
+            "LOCAL_SNOWFLAKE_DB": os.path.join(cls.directory.name, "local_snowflake.db"),
+            "LOCAL_SNOWFLAKE_ROWS": "500",
+        })
+        cls.environ.start()
+        SnowflakeUtil.dispose_engine()
+
+    @classmethod
+    def tearDownClass(cls):
+        SnowflakeUtil.dispose_engine()
+        cls.environ.stop()
+        cls.directory.cleanup()
+
+    def run_sql(self, mode: str):
+        with mock.patch.dict(os.environ, {"SNOWFLAKE_FETCH_MODE": mode}):
+            return Analyzer.run_sql_node({"sql_query": self.QUERY, "use_cache": False})["result_df"]
+
+    def test_qualified_query_runs_in_both_fetch_modes(self):
+        arrow, pandas = self.run_sql("arrow"), self.run_sql("pandas")
+        self.assertIsNotNone(arrow)
+        self.assertIsNotNone(pandas)
+        self.assertGreater(len(arrow), 0)
+        self.assertEqual(arrow["CURRENCY_CODE"].tolist(), pandas["CURRENCY_CODE"].tolist())
+        self.assertEqual(arrow["QUOTES"].tolist(), pandas["QUOTES"].tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()